@@ -3,8 +3,11 @@ import base64
 import collections
 import datetime
 from email.utils import parsedate_tz
+import hashlib
 import heapq
+import json
 import logging
+import os
 import re
 import sys
 import time
@@ -43,6 +46,9 @@ if sys.version_info < (2, 7, 9):  # pragma: no cover
 
 DEFAULT_NETWORK_TIMEOUT = 45
 
+DEFAULT_DIRECTORY_CACHE_TTL = 3600
+"""Seconds during which a cached directory is used without revalidation."""
+
 DER_CONTENT_TYPE = 'application/pkix-cert'
 
 
@@ -827,8 +833,20 @@ class BackwardsCompatibleClientV2(object):
     :ivar .ClientBase client: either Client or ClientV2
     """
 
-    def __init__(self, net, key, server):
-        directory = messages.Directory.from_json(net.get(server).json())
+    def __init__(self, net, key, server, directory_cache=None):
+        """Initialize.
+
+        :param .ClientNetwork net: Client network.
+        :param key: `josepy.JWK` (private)
+        :param str server: URL of the ACME directory.
+        :param .DirectoryCache directory_cache: Cache of the directory
+            document. If not supplied, the directory is always fetched.
+
+        """
+        if directory_cache is None:
+            directory = messages.Directory.from_json(net.get(server).json())
+        else:
+            directory = directory_cache.get(net, server)
         self.acme_version = self._acme_version_from_directory(directory)
         if self.acme_version == 1:
             self.client = Client(directory, key=key, net=net)
@@ -951,6 +969,96 @@ class BackwardsCompatibleClientV2(object):
         return self.client.external_account_required()
 
 
+class DirectoryCache(object):
+    """On-disk cache of ACME directory documents.
+
+    Each directory is stored in its own file, along with its ``ETag``.
+    A directory fetched less than ``ttl`` seconds ago is used as is,
+    otherwise it is revalidated with a conditional GET request, so an
+    unchanged directory isn't downloaded again.
+
+    :ivar str path: Directory where the documents are stored.
+    :ivar int ttl: Seconds during which a document is used without
+        revalidation.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_DIRECTORY_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def get(self, net, url):
+        """Return the directory at ``url``, fetching it only when needed.
+
+        :param .ClientNetwork net: Client network.
+        :param str url: URL of the directory.
+
+        :returns: The directory.
+        :rtype: `.messages.Directory`
+
+        """
+        entry = self._load(url)
+        now = time.time()
+        if entry is not None and 0 <= now - entry['fetched'] < self.ttl:
+            return messages.Directory.from_json(dict(entry['directory']))
+
+        if entry is not None and entry.get('etag'):
+            # A 304 response has no JSON body to check
+            response = net.get(url, content_type=None,
+                               headers={'If-None-Match': entry['etag']})
+        else:
+            response = net.get(url)
+        etag = response.headers.get('ETag')
+        if entry is not None and response.status_code == http_client.NOT_MODIFIED:
+            logger.debug('Cached directory for %s is still valid', url)
+            jobj = entry['directory']
+            etag = etag or entry.get('etag')
+        else:
+            try:
+                jobj = response.json()
+            except ValueError:
+                raise errors.ClientError(
+                    'Unexpected response Content-Type: {0}'.format(
+                        response.headers.get('Content-Type')))
+        # from_json replaces the meta field of the object it is given
+        directory = messages.Directory.from_json(dict(jobj))
+        self._save(url, {
+            'url': url,
+            'etag': etag,
+            'fetched': now,
+            'directory': jobj,
+        })
+        return directory
+
+    def _file(self, url):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + '.json')
+
+    def _load(self, url):
+        try:
+            with open(self._file(url)) as cache_file:
+                entry = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('url') != url or \
+                not isinstance(entry.get('fetched'), (int, float)) or 'directory' not in entry:
+            return None
+        return entry
+
+    def _save(self, url, entry):
+        path = self._file(url)
+        temp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o755)
+            with open(temp_path, 'w') as cache_file:
+                json.dump(entry, cache_file)
+            # os.replace doesn't exist on Python 2, where os.rename only
+            # overwrites existing files on POSIX systems
+            getattr(os, 'replace', os.rename)(temp_path, path)
+        except (IOError, OSError) as error:
+            logger.debug('Unable to cache the directory of %s: %s', url, error)
+
+
 class ClientNetwork(object):
     """Wrapper around requests that signs POSTs for authentication.
 
@@ -3,6 +3,9 @@
 import copy
 import datetime
 import json
+import os
+import shutil
+import tempfile
 import unittest
 
 import josepy as jose
@@ -127,6 +130,17 @@ class BackwardsCompatibleClientV2Test(ClientTestBase):
             key=KEY, server=uri)
         self.net.get.assert_called_once_with(uri)
 
+    def test_init_uses_directory_cache(self):
+        uri = 'http://www.letsencrypt-demo.org/directory'
+        directory_cache = mock.MagicMock()
+        directory_cache.get.return_value = DIRECTORY_V2
+        from acme.client import BackwardsCompatibleClientV2
+        client = BackwardsCompatibleClientV2(net=self.net, key=KEY, server=uri,
+                                             directory_cache=directory_cache)
+        directory_cache.get.assert_called_once_with(self.net, uri)
+        self.assertFalse(self.net.get.called)
+        self.assertEqual(client.acme_version, 2)
+
     def test_init_acme_version(self):
         self.response.json.return_value = DIRECTORY_V1.to_json()
         client = self._init()
@@ -317,6 +331,93 @@ class BackwardsCompatibleClientV2Test(ClientTestBase):
         self.assertFalse(client.external_account_required())
 
 
+class DirectoryCacheTest(unittest.TestCase):
+    """Tests for acme.client.DirectoryCache."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.url = 'https://www.letsencrypt-demo.org/directory'
+        self.response = mock.MagicMock(status_code=http_client.OK,
+                                       headers={'ETag': '"v1"'})
+        self.response.json.return_value = json.loads(DIRECTORY_V2.json_dumps())
+        self.net = mock.MagicMock()
+        self.net.get.return_value = self.response
+
+        from acme.client import DirectoryCache
+        self.cache = DirectoryCache(os.path.join(self.tempdir, 'directories'), ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _assert_directory(self, directory, expected):
+        expected = messages.Directory.from_json(json.loads(expected.json_dumps()))
+        self.assertEqual(directory.json_dumps(), expected.json_dumps())
+
+    def test_fresh_entry_is_reused(self):
+        self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V2)
+        self.net.get.assert_called_once_with(self.url)
+        self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V2)
+        self.assertEqual(self.net.get.call_count, 1)
+
+    @mock.patch('acme.client.time.time')
+    def test_stale_entry_is_revalidated(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.get(self.net, self.url)
+
+        mock_time.return_value = 1100
+        self.response.status_code = http_client.NOT_MODIFIED
+        self.response.headers = {}
+        self.response.json.side_effect = ValueError
+        self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V2)
+        self.net.get.assert_called_with(self.url, content_type=None,
+                                        headers={'If-None-Match': '"v1"'})
+
+        # The revalidated entry is fresh again and keeps its ETag
+        mock_time.return_value = 1150
+        self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V2)
+        self.assertEqual(self.net.get.call_count, 2)
+        mock_time.return_value = 1300
+        self.cache.get(self.net, self.url)
+        self.net.get.assert_called_with(self.url, content_type=None,
+                                        headers={'If-None-Match': '"v1"'})
+
+    @mock.patch('acme.client.time.time')
+    def test_stale_entry_is_replaced(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.get(self.net, self.url)
+
+        mock_time.return_value = 1100
+        self.response.headers = {}
+        self.response.json.return_value = json.loads(DIRECTORY_V1.json_dumps())
+        self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V1)
+
+        mock_time.return_value = 1200
+        self.cache.get(self.net, self.url)
+        self.net.get.assert_called_with(self.url)
+
+    def test_invalid_response(self):
+        self.cache.ttl = 0
+        self.cache.get(self.net, self.url)
+        self.response.json.side_effect = ValueError
+        self.assertRaises(errors.ClientError, self.cache.get, self.net, self.url)
+
+    def test_unreadable_entry(self):
+        os.makedirs(self.cache.path)
+        for content in ('not json', json.dumps({'url': 'https://other.example/'})):
+            with open(self.cache._file(self.url), 'w') as cache_file:  # pylint: disable=protected-access
+                cache_file.write(content)
+            self.net.get.reset_mock()
+            self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V2)
+            self.net.get.assert_called_once_with(self.url)
+
+    def test_unwritable_directory(self):
+        with open(self.cache.path, 'w'):
+            pass
+        self._assert_directory(self.cache.get(self.net, self.url), DIRECTORY_V2)
+        self.cache.get(self.net, self.url)
+        self.assertEqual(self.net.get.call_count, 2)
+
+
 class ClientTest(ClientTestBase):
     """Tests for acme.client.Client."""
 
@@ -18,11 +18,16 @@ except ImportError:  # pragma: no cover
     HAS_APACHECONFIG = False
 
 from acme import challenges
+from acme import crypto_util as acme_crypto_util
+from acme import errors as acme_errors
 from acme.magic_typing import DefaultDict
 from acme.magic_typing import Dict
 from acme.magic_typing import List
+from acme.magic_typing import Optional
 from acme.magic_typing import Set
+from acme.magic_typing import Tuple
 from acme.magic_typing import Union
+from certbot import crypto_util
 from certbot import errors
 from certbot import interfaces
 from certbot import util
@@ -196,6 +201,10 @@ class ApacheConfigurator(common.Installer):
             help="Full path to Apache control script")
         add("bin", default=DEFAULTS["bin"],
             help="Full path to apache2/httpd binary")
+        add("readiness-timeout", default=0, type=int,
+            help="After reloading Apache, wait up to this many seconds for "
+                 "the newly deployed certificates to be served on their "
+                 "virtual host addresses (0 disables the check)")
 
     def __init__(self, *args, **kwargs):
         """Initialize an Apache Configurator.
@@ -222,6 +231,11 @@ class ApacheConfigurator(common.Installer):
         self._autohsts = {}  # type: Dict[str, Dict[str, Union[int, float]]]
         # Reverter save notes
         self.save_notes = ""
+        # Titles of the saves deferred by an open transaction, or None
+        self._transaction_titles = None  # type: Optional[List[str]]
+        # Certificates deployed since the last reload, as
+        # (server name, host, port, serial) to be checked after a reload
+        self._readiness_probes = []  # type: List[Tuple[str, str, int, int]]
         # Should we use ParserNode implementation instead of the old behavior
         self.USE_PARSERNODE = use_parsernode
         # Saves the list of file paths that were parsed initially, and
@@ -234,6 +248,8 @@ class ApacheConfigurator(common.Installer):
         self.version = version
         self._openssl_version = openssl_version
         self.vhosts = None
+        # Name index of self.vhosts, built lazily by _get_vhost_index()
+        self._vhost_index = None  # type: Optional[obj.VirtualHostIndex]
         self.options = copy.deepcopy(self.OS_DEFAULTS)
         self._enhance_func = {"redirect": self._enable_redirect,
                               "ensure-http-header": self._set_http_header,
@@ -378,6 +394,30 @@ class ApacheConfigurator(common.Installer):
             configuration will be saved as a new checkpoint and put in a
             timestamped directory.
 
+        :param bool temporary: Indicates whether the changes made will
+            be quickly reversed in the future (ie. challenges)
+
+        While a transaction is open (see :meth:`begin_transaction`),
+        permanent saves only record their title and the changes are kept in
+        the Augeas DOM until the transaction is committed.
+
+        """
+        if self._transaction_titles is not None and not temporary:
+            if title and title not in self._transaction_titles:
+                self._transaction_titles.append(title)
+            return
+        self.write_changes(temporary)
+        if title and not temporary:
+            self.finalize_checkpoint(title)
+
+    def write_changes(self, temporary=False):
+        """Writes the changes in the Augeas DOM to the configuration files.
+
+        Modified files are first added to the in progress (or temporary)
+        checkpoint. Unlike :meth:`save`, this is never deferred by an open
+        transaction, so it is used whenever the files on disk need to reflect
+        the Augeas DOM, eg. before reloading Augeas.
+
         :param bool temporary: Indicates whether the changes made will
             be quickly reversed in the future (ie. challenges)
 
@@ -388,8 +428,29 @@ class ApacheConfigurator(common.Installer):
                                    self.save_notes, temporary=temporary)
         # Handle the parser specific tasks
         self.parser.save(save_files)
-        if title and not temporary:
-            self.finalize_checkpoint(title)
+
+    def begin_transaction(self):
+        """Starts deferring permanent saves.
+
+        Multi-domain operations save the configuration after every domain and
+        enhancement. Within a transaction those saves are accumulated so that
+        :meth:`commit_transaction` writes every modified file once, as a
+        single checkpoint.
+
+        """
+        if self._transaction_titles is None:
+            self._transaction_titles = []
+
+    def commit_transaction(self):
+        """Saves all changes made since :meth:`begin_transaction`.
+
+        :raises .errors.PluginError: If unable to save the configuration
+
+        """
+        titles = self._transaction_titles
+        self._transaction_titles = None
+        if titles is not None:
+            self.save(", ".join(titles) if titles else None)
 
     def recovery_routine(self):
         """Revert all previously modified files.
@@ -399,6 +460,9 @@ class ApacheConfigurator(common.Installer):
         :raises .errors.PluginError: If unable to recover the configuration
 
         """
+        # Changes deferred by an open transaction are discarded as well
+        self._transaction_titles = None
+        self._readiness_probes = []
         super(ApacheConfigurator, self).recovery_routine()
         # Reload configuration after these changes take effect if needed
         # ie. ApacheParser has been initialized.
@@ -425,6 +489,7 @@ class ApacheConfigurator(common.Installer):
 
         """
         super(ApacheConfigurator, self).rollback_checkpoints(rollback)
+        self._readiness_probes = []
         self.parser.aug.load()
 
     def _verify_exe_availability(self, exe):
@@ -484,6 +549,33 @@ class ApacheConfigurator(common.Installer):
         vhosts = self.choose_vhosts(domain)
         for vhost in vhosts:
             self._deploy_cert(vhost, cert_path, key_path, chain_path, fullchain_path)
+            if self.conf("readiness-timeout"):
+                self._add_readiness_probes(domain, vhost, cert_path)
+
+    def _add_readiness_probes(self, domain, vhost, cert_path):
+        """Remember where the certificate deployed to vhost should be served.
+
+        :param str domain: domain the certificate was deployed for
+        :param vhost: VirtualHost the certificate was deployed to
+        :type vhost: :class:`~certbot_apache._internal.obj.VirtualHost`
+        :param str cert_path: path to the deployed certificate
+
+        """
+        name = domain if "*" not in domain else vhost.name
+        if not name or "*" in name:
+            logger.debug("No server name to probe %s with after reload",
+                         vhost.filep)
+            return
+        serial = crypto_util.get_serial_from_cert(cert_path)
+        for addr in vhost.addrs:
+            host = addr.get_addr()
+            if host in ("*", "_default_"):
+                host = "localhost"
+            port = addr.get_port()
+            probe = (name, host.strip("[]"),
+                     int(port) if port.isdigit() else 443, serial)
+            if probe not in self._readiness_probes:
+                self._readiness_probes.append(probe)
 
     def choose_vhosts(self, domain, create_if_no_ssl=True):
         """
@@ -515,10 +607,9 @@ class ApacheConfigurator(common.Installer):
 
         # Collect all vhosts that match the name
         matched = set()
-        for vhost in self.vhosts:
-            for name in vhost.get_names():
-                if self._in_wildcard_scope(name, domain):
-                    matched.add(vhost)
+        for name, vhost in self._get_vhost_index().wildcard_candidates(domain):
+            if self._in_wildcard_scope(name, domain):
+                matched.add(vhost)
 
         return list(matched)
 
@@ -781,7 +872,7 @@ class ApacheConfigurator(common.Installer):
         if vhosts is None:
             vhosts = self.vhosts
 
-        for vhost in vhosts:
+        for vhost in self._vhost_candidates(target_name, vhosts):
             if vhost.modmacro is True:
                 continue
             names = vhost.get_names()
@@ -815,6 +906,39 @@ class ApacheConfigurator(common.Installer):
 
         return best_candidate
 
+    def _get_vhost_index(self):
+        """Returns the name index of self.vhosts, building it if needed.
+
+        :returns: index of the currently known vhosts
+        :rtype: :class:`~certbot_apache._internal.obj.VirtualHostIndex`
+
+        """
+        if self._vhost_index is None or not self._vhost_index.is_current(self.vhosts):
+            self._vhost_index = obj.VirtualHostIndex(self.vhosts)
+        return self._vhost_index
+
+    def _vhost_candidates(self, target_name, vhosts):
+        """Narrows down vhosts to the ones that may serve target_name.
+
+        :param str target_name: domain handled by the desired vhost
+        :param vhosts: vhosts to consider
+        :type vhosts: `collections.Iterable` of :class:`~certbot_apache._internal.obj.VirtualHost`
+
+        :returns: candidate vhosts, in the order they appear in vhosts
+        :rtype: `list` of :class:`~certbot_apache._internal.obj.VirtualHost`
+
+        """
+        index = self._get_vhost_index()
+        candidates = index.candidates(target_name)
+        if vhosts is self.vhosts:
+            return candidates
+
+        positions = dict((id(vhost), i) for i, vhost in enumerate(vhosts))
+        candidates = [vhost for vhost in candidates if id(vhost) in positions]
+        # Vhosts unknown to the index have to be considered as well
+        candidates.extend(vhost for vhost in vhosts if not index.contains(vhost))
+        return sorted(candidates, key=lambda vhost: positions[id(vhost)])
+
     def _non_default_vhosts(self, vhosts):
         """Return all non _default_ only vhosts."""
         return [vh for vh in vhosts if not all(
@@ -883,32 +1007,45 @@ class ApacheConfigurator(common.Installer):
         :returns: Tuple including ServerName and `list` of ServerAlias strings
         """
 
-        servername_match = self.parser.find_dir(
-            "ServerName", None, start=path, exclude=False)
-        serveralias_match = self.parser.find_dir(
-            "ServerAlias", None, start=path, exclude=False)
+        matches = self.parser.find_dirs(
+            ["ServerName", "ServerAlias"], start=path, exclude=False)
+        return self._vhost_names_from_matches(matches)
 
+    def _vhost_names_from_matches(self, matches):
+        """Helper method for turning :meth:`.ApacheParser.find_dirs` results
+        into ServerName and ServerAlias values
+
+        :param dict matches: Argument paths of the ServerName and ServerAlias
+            directives found in a vhost
+
+        :returns: Tuple including ServerName and `list` of ServerAlias strings
+        """
         serveraliases = []
-        for alias in serveralias_match:
+        for alias in matches["serveralias"]:
             serveralias = self.parser.get_arg(alias)
             serveraliases.append(serveralias)
 
         servername = None
-        if servername_match:
+        if matches["servername"]:
             # Get last ServerName as each overwrites the previous
-            servername = self.parser.get_arg(servername_match[-1])
+            servername = self.parser.get_arg(matches["servername"][-1])
 
         return (servername, serveraliases)
 
-    def _add_servernames(self, host):
+    def _add_servernames(self, host, matches=None):
         """Helper function for get_virtual_hosts().
 
         :param host: In progress vhost whose names will be added
         :type host: :class:`~certbot_apache._internal.obj.VirtualHost`
+        :param dict matches: ServerName and ServerAlias argument paths that
+            were already looked up for the vhost, if any
 
         """
 
-        servername, serveraliases = self._get_vhost_names(host.path)
+        if matches is None:
+            servername, serveraliases = self._get_vhost_names(host.path)
+        else:
+            servername, serveraliases = self._vhost_names_from_matches(matches)
 
         for alias in serveraliases:
             if not host.modmacro:
@@ -917,10 +1054,13 @@ class ApacheConfigurator(common.Installer):
         if not host.modmacro:
             host.name = servername
 
-    def _create_vhost(self, path):
+    def _create_vhost(self, path, file_cache=None):
         """Used by get_virtual_hosts to create vhost objects
 
         :param str path: Augeas path to virtual host
+        :param dict file_cache: Optional mapping shared between calls that
+            memoizes the filename and enabled state of each Augeas file path,
+            as many vhosts usually live in the same file
 
         :returns: newly created vhost
         :rtype: :class:`~certbot_apache._internal.obj.VirtualHost`
@@ -936,8 +1076,14 @@ class ApacheConfigurator(common.Installer):
             addrs.add(obj.Addr.fromstring(self.parser.get_arg(arg)))
         is_ssl = False
 
-        if self.parser.find_dir("SSLEngine", "on", start=path, exclude=False):
-            is_ssl = True
+        # Look up everything needed from the vhost subtree in one pass
+        matches = self.parser.find_dirs(
+            ["SSLEngine", "ServerName", "ServerAlias"], start=path, exclude=False)
+
+        for sslengine in matches["sslengine"]:
+            value = self.parser.aug.get(sslengine)
+            if value and value.lower() == "on":
+                is_ssl = True
 
         # "SSLEngine on" might be set outside of <VirtualHost>
         # Treat vhosts with port 443 as ssl vhosts
@@ -945,8 +1091,17 @@ class ApacheConfigurator(common.Installer):
             if addr.get_port() == "443":
                 is_ssl = True
 
-        filename = apache_util.get_file_path(
-            self.parser.aug.get("/augeas/files%s/path" % apache_util.get_file_path(path)))
+        if file_cache is None:
+            file_cache = {}
+        aug_file_path = apache_util.get_file_path(path)
+        if aug_file_path not in file_cache:
+            filename = apache_util.get_file_path(
+                self.parser.aug.get("/augeas/files%s/path" % aug_file_path))
+            enabled = None
+            if filename is not None:
+                enabled = self.parser.parsed_in_original(filename)
+            file_cache[aug_file_path] = (filename, enabled)
+        filename, vhost_enabled = file_cache[aug_file_path]
         if filename is None:
             return None
 
@@ -954,11 +1109,9 @@ class ApacheConfigurator(common.Installer):
         if "/macro/" in path.lower():
             macro = True
 
-        vhost_enabled = self.parser.parsed_in_original(filename)
-
         vhost = obj.VirtualHost(filename, path, addrs, is_ssl,
                                 vhost_enabled, modmacro=macro)
-        self._add_servernames(vhost)
+        self._add_servernames(vhost, matches)
         return vhost
 
     def get_virtual_hosts(self):
@@ -996,6 +1149,9 @@ class ApacheConfigurator(common.Installer):
         file_paths = {}  # type: Dict[str, str]
         internal_paths = defaultdict(set)  # type: DefaultDict[str, Set[str]]
         vhs = []
+        # Many vhosts share a file, so resolve each file only once
+        file_cache = {}  # type: Dict[str, Tuple[Optional[str], Optional[bool]]]
+        realpaths = {}  # type: Dict[str, str]
         # Make a list of parser paths because the parser_paths
         # dictionary may be modified during the loop.
         for vhost_path in list(self.parser.parser_paths):
@@ -1005,11 +1161,13 @@ class ApacheConfigurator(common.Installer):
             paths = [path for path in paths if
                      "virtualhost" in os.path.basename(path).lower()]
             for path in paths:
-                new_vhost = self._create_vhost(path)
+                new_vhost = self._create_vhost(path, file_cache)
                 if not new_vhost:
                     continue
                 internal_path = apache_util.get_internal_aug_path(new_vhost.path)
-                realpath = filesystem.realpath(new_vhost.filep)
+                if new_vhost.filep not in realpaths:
+                    realpaths[new_vhost.filep] = filesystem.realpath(new_vhost.filep)
+                realpath = realpaths[new_vhost.filep]
                 if realpath not in file_paths:
                     file_paths[realpath] = new_vhost.filep
                     internal_paths[realpath].add(internal_path)
@@ -1334,6 +1492,10 @@ class ApacheConfigurator(common.Installer):
         avail_fp = nonssl_vhost.filep
         ssl_fp = self._get_ssl_vhost_path(avail_fp)
 
+        # The skeleton is copied from the file on disk and Augeas is reloaded
+        # afterwards, so make sure all changes to the config are written out
+        self.parser.ensure_augeas_state()
+
         orig_matches = self.parser.aug.match("/files%s//* [label()=~regexp('%s')]" %
                                       (self._escape(ssl_fp),
                                        parser.case_i("VirtualHost")))
@@ -1669,6 +1831,8 @@ class ApacheConfigurator(common.Installer):
         else:
             self.parser.add_dir(vh_path, "ServerAlias", target_name)
         self._add_servernames(vhost)
+        if self._vhost_index is not None:
+            self._vhost_index.update(vhost)
 
     def _has_matching_wildcard(self, vh_path, target_name):
         """Is target_name already included in a wildcard in the vhost?
@@ -2226,6 +2390,8 @@ class ApacheConfigurator(common.Installer):
 
         redirect_filepath = self._write_out_redirect(ssl_vhost, text)
 
+        # Make sure we're not throwing away any unwritten changes to the config
+        self.parser.ensure_augeas_state()
         self.parser.aug.load()
         # Make a new vhost data structure and add it to the lists
         new_vhost = self._create_vhost(parser.get_aug_path(self._escape(redirect_filepath)))
@@ -2386,12 +2552,58 @@ class ApacheConfigurator(common.Installer):
     def restart(self):
         """Runs a config test and reloads the Apache server.
 
+        If certificates were deployed since the last reload and
+        ``--apache-readiness-timeout`` is set, waits until Apache serves
+        them before returning.
+
         :raises .errors.MisconfigurationError: If either the config test
             or reload fails.
 
         """
         self.config_test()
+        started = time.time()
         self._reload()
+        probes, self._readiness_probes = self._readiness_probes, []
+        if probes:
+            self._wait_until_serving(probes, started)
+
+    def _wait_until_serving(self, probes, started):
+        """Waits for Apache to serve the newly deployed certificates.
+
+        Each probe is a TLS handshake with the server name sent as SNI,
+        comparing the serial number of the served certificate with the
+        deployed one. Probes that don't succeed before the timeout are
+        reported as warnings, the reload itself is not considered failed.
+
+        :param list probes: (server name, host, port, serial) tuples
+        :param float started: time the reload was started at
+
+        """
+        deadline = started + self.conf("readiness-timeout")
+        pending = list(probes)
+        while pending:
+            for probe in list(pending):
+                name, host, port, serial = probe
+                try:
+                    cert = acme_crypto_util.probe_sni(
+                        name.encode(), host, port, timeout=constants.READINESS_PROBE_TIMEOUT)
+                except acme_errors.Error as error:
+                    logger.debug("Readiness probe of %s on %s:%d failed: %s",
+                                 name, host, port, error)
+                    continue
+                if cert.get_serial_number() == serial:
+                    pending.remove(probe)
+                    logger.info("Apache is serving the new certificate for %s "
+                                "on %s:%d after %.2f seconds", name, host, port,
+                                time.time() - started)
+            if pending and time.time() >= deadline:
+                for name, host, port, _ in pending:
+                    logger.warning("Apache did not serve the new certificate for "
+                                   "%s on %s:%d within %d seconds of the reload",
+                                   name, host, port, self.conf("readiness-timeout"))
+                return
+            if pending:
+                time.sleep(constants.READINESS_PROBE_INTERVAL)
 
     def _reload(self):
         """Reloads the Apache server.
@@ -2714,3 +2926,4 @@ class ApacheConfigurator(common.Installer):
 
 
 AutoHSTSEnhancement.register(ApacheConfigurator)
+interfaces.TransactionalInstaller.register(ApacheConfigurator)
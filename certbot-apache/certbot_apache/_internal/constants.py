@@ -70,3 +70,9 @@ AUTOHSTS_FREQ = 172800
 MANAGED_COMMENT = "DO NOT REMOVE - Managed by Certbot"
 MANAGED_COMMENT_ID = MANAGED_COMMENT+", VirtualHost id: {0}"
 """Managed by Certbot comments and the VirtualHost identification template"""
+
+READINESS_PROBE_INTERVAL = 0.5
+"""Seconds to wait between readiness probes after an Apache reload"""
+
+READINESS_PROBE_TIMEOUT = 5
+"""Timeout in seconds of a single readiness probe TLS handshake"""
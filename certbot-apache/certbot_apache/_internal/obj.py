@@ -1,7 +1,11 @@
 """Module contains classes used by the Apache Configurator."""
+import fnmatch
 import re
 
+from acme.magic_typing import Dict
+from acme.magic_typing import List
 from acme.magic_typing import Set
+from acme.magic_typing import Tuple
 from certbot.plugins import common
 
 
@@ -268,3 +272,154 @@ class VirtualHost(object):
                 return False
 
         return True
+
+
+class VirtualHostIndex(object):
+    """Lookup index from domain names to the VirtualHosts serving them.
+
+    The index mirrors the configurator's list of vhosts and answers the
+    questions ``_find_best_vhost`` and wildcard vhost selection ask without
+    comparing the target name against every name of every vhost.
+
+    Vhosts appended to the indexed list are picked up automatically; vhosts
+    whose names change must be passed to :meth:`update`.
+
+    :ivar list vhosts: The indexed list of
+        :class:`~certbot_apache._internal.obj.VirtualHost` objects
+
+    """
+    wildcard_chars = ("*", "?")
+
+    def __init__(self, vhosts):
+        self.vhosts = vhosts
+        # Position of each vhost in self.vhosts, keyed by id()
+        self._order = {}  # type: Dict[int, int]
+        # Names of each vhost at the time it was indexed, keyed by id()
+        self._indexed_names = {}  # type: Dict[int, Set[str]]
+        self._names = {}  # type: Dict[str, List[VirtualHost]]
+        self._lower_names = {}  # type: Dict[str, List[VirtualHost]]
+        # Wildcard names keyed by the literal suffix after their last wildcard
+        self._patterns = {}  # type: Dict[str, List[Tuple[str, VirtualHost]]]
+        # Names keyed by everything after their first label
+        self._parents = {}  # type: Dict[str, List[Tuple[str, VirtualHost]]]
+        self._addrs = {}  # type: Dict[str, List[VirtualHost]]
+        for vhost in vhosts:
+            self._index(vhost)
+
+    def is_current(self, vhosts):
+        """Checks whether the index still reflects the given vhost list.
+
+        :param list vhosts: List of vhosts the index should represent
+
+        :returns: `True` if the index is up to date with ``vhosts``
+        :rtype: bool
+
+        """
+        if vhosts is not self.vhosts or len(vhosts) < len(self._order):
+            return False
+        # Pick up vhosts appended since the last lookup
+        for vhost in vhosts[len(self._order):]:
+            self._index(vhost)
+        return True
+
+    def contains(self, vhost):
+        """Checks whether vhost is part of the index.
+
+        :param vhost: Vhost to look for
+        :type vhost: :class:`~certbot_apache._internal.obj.VirtualHost`
+
+        :rtype: bool
+
+        """
+        return id(vhost) in self._order
+
+    def update(self, vhost):
+        """Reindexes a vhost whose names have changed.
+
+        :param vhost: Vhost to reindex
+        :type vhost: :class:`~certbot_apache._internal.obj.VirtualHost`
+
+        """
+        if not self.contains(vhost):
+            return
+        for name in self._indexed_names[id(vhost)]:
+            lower = name.lower()
+            _discard(self._names, name, vhost)
+            _discard(self._lower_names, lower, vhost)
+            _discard(self._patterns, self._pattern_suffix(lower), vhost)
+            _discard(self._parents, name.partition(".")[2], vhost)
+        self._index_names(vhost)
+
+    def candidates(self, target_name):
+        """Returns vhosts that may serve target_name.
+
+        The result contains every vhost whose names match target_name
+        exactly or by wildcard, or which has an address equal to
+        target_name, in the order of the indexed vhost list.
+
+        :param str target_name: domain name to look up
+
+        :returns: candidate vhosts
+        :rtype: `list` of :class:`~certbot_apache._internal.obj.VirtualHost`
+
+        """
+        found = {}  # type: Dict[int, VirtualHost]
+        for vhost in self._names.get(target_name, []):
+            found[id(vhost)] = vhost
+        target_lower = target_name.lower()
+        for vhost in self._lower_names.get(target_lower, []):
+            found[id(vhost)] = vhost
+        for i in range(len(target_lower) + 1):
+            for pattern, vhost in self._patterns.get(target_lower[i:], []):
+                if fnmatch.fnmatch(target_lower, pattern):
+                    found[id(vhost)] = vhost
+        for vhost in self._addrs.get(target_name, []):
+            found[id(vhost)] = vhost
+        return sorted(found.values(), key=lambda vh: self._order[id(vh)])
+
+    def wildcard_candidates(self, domain):
+        """Returns vhosts with a name on the same level as a wildcard domain.
+
+        :param str domain: wildcard domain, e.g. ``*.example.com``
+
+        :returns: vhosts having a name with the same parent domain as
+            ``domain`` together with that name
+        :rtype: `list` of `tuple` of (`str`,
+            :class:`~certbot_apache._internal.obj.VirtualHost`)
+
+        """
+        return list(self._parents.get(domain.partition(".")[2], []))
+
+    def _index(self, vhost):
+        self._order[id(vhost)] = len(self._order)
+        for addr in vhost.addrs:
+            self._addrs.setdefault(addr.get_addr(), []).append(vhost)
+        self._index_names(vhost)
+
+    def _index_names(self, vhost):
+        names = vhost.get_names()
+        self._indexed_names[id(vhost)] = names
+        for name in names:
+            self._names.setdefault(name, []).append(vhost)
+            self._parents.setdefault(name.partition(".")[2], []).append((name, vhost))
+            lower = name.lower()
+            # fnmatch treats "[seq]" specially and [ or ] characters aren't
+            # valid in Apache, so such names are only ever matched exactly
+            if "[" in lower:
+                continue
+            if any(char in lower for char in self.wildcard_chars):
+                self._patterns.setdefault(
+                    self._pattern_suffix(lower), []).append((lower, vhost))
+            else:
+                self._lower_names.setdefault(lower, []).append(vhost)
+
+    def _pattern_suffix(self, pattern):
+        last = max(pattern.rfind(char) for char in self.wildcard_chars)
+        return pattern[last + 1:]
+
+
+def _discard(index, key, vhost):
+    """Removes the entries of vhost stored under key in index."""
+    if key in index:
+        index[key] = [entry for entry in index[key] if
+                      (entry[1] if isinstance(entry, tuple) else entry) is not vhost]
@@ -9,6 +9,7 @@ import six
 
 from acme.magic_typing import Dict
 from acme.magic_typing import List
+from acme.magic_typing import Tuple
 from certbot import errors
 from certbot.compat import os
 from certbot_apache._internal import apache_util
@@ -191,7 +192,7 @@ class ApacheParser(object):
 
         if self.unsaved_files():
             self.configurator.save_notes += "(autosave)"
-            self.configurator.save()
+            self.configurator.write_changes()
 
     def save(self, save_files):
         """Saves all changes to the configuration files.
@@ -539,11 +540,9 @@ class ApacheParser(object):
         # includes = self.aug.match(start +
         # "//* [self::directive='Include']/* [label()='arg']")
 
-        regex = "(%s)|(%s)|(%s)" % (case_i(directive),
-                                    case_i("Include"),
-                                    case_i("IncludeOptional"))
         matches = self.aug.match(
-            "%s//*[self::directive=~regexp('%s')]" % (start, regex))
+            "%s//*[self::directive=~regexp('%s')]" % (
+                start, directives_regex((directive,))))
 
         if exclude:
             matches = self.exclude_dirs(matches)
@@ -554,22 +553,69 @@ class ApacheParser(object):
             arg_suffix = "/*[self::arg=~regexp('%s')]" % case_i(arg)
 
         ordered_matches = []  # type: List[str]
+        directive_l = directive.lower()
 
         # TODO: Wildcards should be included in alphabetical order
         # https://httpd.apache.org/docs/2.4/mod/core.html#include
         for match in matches:
             dir_ = self.aug.get(match).lower()
-            if dir_ in ("include", "includeoptional"):
+            if dir_ in _INCLUDE_DIRECTIVES:
                 ordered_matches.extend(self.find_dir(
                     directive, arg,
                     self._get_include_path(self.get_arg(match + "/arg")),
                     exclude))
             # This additionally allows Include
-            if dir_ == directive.lower():
+            if dir_ == directive_l:
                 ordered_matches.extend(self.aug.match(match + arg_suffix))
 
         return ordered_matches
 
+    def find_dirs(self, directives, start=None, exclude=True):
+        """Finds several directives in the configuration in a single pass.
+
+        This is equivalent to calling :meth:`find_dir` without an ``arg``
+        for each of the directives, but the Augeas tree (and every Include
+        encountered along the way) is only walked once.
+
+        :param list directives: Directive names to look for
+        :param str start: Beginning Augeas path to begin looking
+        :param bool exclude: Whether or not to exclude directives based on
+            variables and enabled modules
+
+        :returns: Mapping of lowercase directive name to the list of
+            argument paths, in the order :meth:`find_dir` would return them
+        :rtype: dict
+
+        """
+        if not start:
+            start = get_aug_path(self.loc["root"])
+
+        results = {}  # type: Dict[str, List[str]]
+        for directive in directives:
+            results[directive.lower()] = []
+
+        matches = self.aug.match(
+            "%s//*[self::directive=~regexp('%s')]" % (
+                start, directives_regex(tuple(directives))))
+
+        if exclude:
+            matches = self.exclude_dirs(matches)
+
+        for match in matches:
+            dir_ = self.aug.get(match).lower()
+            if dir_ in _INCLUDE_DIRECTIVES:
+                included = self.find_dirs(
+                    directives,
+                    self._get_include_path(self.get_arg(match + "/arg")),
+                    exclude)
+                for name, paths in included.items():
+                    results[name].extend(paths)
+            # This additionally allows Include
+            if dir_ in results:
+                results[dir_].extend(self.aug.match(match + "/arg"))
+
+        return results
+
     def get_all_args(self, match):
         """
         Tries to fetch all arguments for a directive. See get_arg.
@@ -625,22 +671,25 @@ class ApacheParser(object):
         valid_matches = []
 
         for match in matches:
+            match_l = match.lower()
             for filter_ in filters:
-                if not self._pass_filter(match, filter_):
+                if not self._pass_filter(match, filter_, match_l):
                     break
             else:
                 valid_matches.append(match)
         return valid_matches
 
-    def _pass_filter(self, match, filter_):
+    def _pass_filter(self, match, filter_, match_l=None):
         """Determine if directive passes a filter.
 
         :param str match: Augeas path
         :param list filter: list of tuples of form
             [("lowercase if directive", set of relevant parameters)]
+        :param str match_l: match in lowercase, if already computed
 
         """
-        match_l = match.lower()
+        if match_l is None:
+            match_l = match.lower()
         last_match_idx = match_l.find(filter_[0])
 
         while last_match_idx != -1:
@@ -932,6 +981,13 @@ class ApacheParser(object):
         raise errors.NoInstallationError("Could not find configuration root")
 
 
+_INCLUDE_DIRECTIVES = frozenset(("include", "includeoptional"))
+"""Lowercase names of the directives find_dir follows into other files"""
+
+_CASE_I_CACHE = {}  # type: Dict[str, str]
+_DIRECTIVES_REGEX_CACHE = {}  # type: Dict[Tuple[str, ...], str]
+
+
 def case_i(string):
     """Returns case insensitive regex.
 
@@ -941,11 +997,40 @@ def case_i(string):
     May be replaced by a more proper /i once augeas 1.0 is widely
     supported.
 
+    Results are memoized, as the same directive names are looked up
+    over and over again.
+
     :param str string: string to make case i regex
 
     """
-    return "".join("[" + c.upper() + c.lower() + "]"
-                    if c.isalpha() else c for c in re.escape(string))
+    try:
+        return _CASE_I_CACHE[string]
+    except KeyError:
+        regex = "".join("[" + c.upper() + c.lower() + "]"
+                        if c.isalpha() else c for c in re.escape(string))
+        _CASE_I_CACHE[string] = regex
+        return regex
+
+
+def directives_regex(directives):
+    """Returns the regex find_dir matches directive names against.
+
+    The regex matches any of the given directives as well as Include and
+    IncludeOptional, regardless of case. Results are memoized.
+
+    :param tuple directives: directive names
+
+    :returns: case insensitive regex
+    :rtype: str
+
+    """
+    try:
+        return _DIRECTIVES_REGEX_CACHE[directives]
+    except KeyError:
+        regex = "|".join("(%s)" % case_i(directive) for directive in
+                         directives + ("Include", "IncludeOptional"))
+        _DIRECTIVES_REGEX_CACHE[directives] = regex
+        return regex
 
 
 def get_aug_path(file_path):
@@ -82,6 +82,44 @@ class ConfiguratorReverterTest(util.ApacheTest):
         self.config.recovery_routine()
         self.assertEqual(mock_load.call_count, 1)
 
+    def test_transaction_defers_saves(self):
+        self.config.reverter = mock.Mock()
+        self.config.begin_transaction()
+        self.config.parser.add_dir(
+            self.vh_truth[0].path, "Test", "transaction")
+        self.config.save()
+        self.config.save("First")
+        self.config.save("Second")
+        self.config.save("First")
+        self.assertFalse(self.config.reverter.add_to_checkpoint.called)
+        self.assertFalse(self.config.reverter.finalize_checkpoint.called)
+        self.assertTrue(self.config.parser.unsaved_files())
+
+        self.config.commit_transaction()
+        self.assertEqual(self.config.reverter.add_to_checkpoint.call_count, 1)
+        self.config.reverter.finalize_checkpoint.assert_called_once_with(
+            "First, Second")
+        self.assertFalse(self.config.parser.unsaved_files())
+
+    def test_transaction_temporary_save(self):
+        self.config.reverter = mock.Mock()
+        self.config.begin_transaction()
+        self.config.parser.add_dir(
+            self.vh_truth[0].path, "Test", "transaction")
+        self.config.save("Challenge", temporary=True)
+        self.assertTrue(self.config.reverter.add_to_temp_checkpoint.called)
+
+    def test_transaction_discarded_by_recovery(self):
+        self.config.reverter = mock.Mock()
+        self.config.begin_transaction()
+        self.config.save("Title")
+        self.config.recovery_routine()
+        self.config.commit_transaction()
+        self.assertFalse(self.config.reverter.finalize_checkpoint.called)
+
+        self.config.save("Title")
+        self.config.reverter.finalize_checkpoint.assert_called_once_with("Title")
+
 
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
@@ -334,6 +334,13 @@ class MultipleVhostsTest(util.ApacheTest):
             self.config._find_best_vhost("encryption-example.demo"),
             self.vh_truth[2])
 
+    def test_find_best_vhost_alias_added(self):
+        # pylint: disable=protected-access
+        vhost = self.config._find_best_vhost("certbot.demo")
+        self.assertEqual(self.config._find_best_vhost("new.certbot.demo"), None)
+        self.config._add_servername_alias("new.certbot.demo", vhost)
+        self.assertTrue(self.config._find_best_vhost("new.certbot.demo") is vhost)
+
     def test_non_default_vhosts(self):
         # pylint: disable=protected-access
         vhosts = self.config._non_default_vhosts(self.config.vhosts)
@@ -832,6 +839,67 @@ class MultipleVhostsTest(util.ApacheTest):
 
         self.assertRaises(errors.MisconfigurationError, self.config.restart)
 
+    @mock.patch("certbot_apache._internal.configurator.crypto_util.get_serial_from_cert")
+    def test_add_readiness_probes(self, mock_serial):
+        mock_serial.return_value = 42
+        vhost = self.vh_truth[1]
+        vhost.addrs = set([obj.Addr.fromstring("*:443"),
+                           obj.Addr.fromstring("10.0.0.1")])
+        # pylint: disable=protected-access
+        self.config._add_readiness_probes("encryption-example.demo", vhost, "cert")
+        self.config._add_readiness_probes("encryption-example.demo", vhost, "cert")
+        self.assertEqual(
+            sorted(self.config._readiness_probes),
+            [("encryption-example.demo", "10.0.0.1", 443, 42),
+             ("encryption-example.demo", "localhost", 443, 42)])
+
+        vhost.name = None
+        self.config._add_readiness_probes("*.example.org", vhost, "cert")
+        self.assertEqual(len(self.config._readiness_probes), 2)
+
+    @mock.patch("certbot_apache._internal.configurator.time.sleep")
+    @mock.patch("certbot_apache._internal.configurator.acme_crypto_util.probe_sni")
+    @mock.patch("certbot_apache._internal.configurator.util.run_script")
+    def test_restart_readiness_probe(self, _, mock_probe, mock_sleep):
+        from acme import errors as acme_errors
+        self.config.config.apache_readiness_timeout = 30
+        # pylint: disable=protected-access
+        self.config._readiness_probes = [("example.org", "localhost", 443, 42)]
+        mock_probe.side_effect = [
+            acme_errors.Error("refused"),
+            mock.MagicMock(get_serial_number=mock.MagicMock(return_value=41)),
+            mock.MagicMock(get_serial_number=mock.MagicMock(return_value=42))]
+
+        with mock.patch("certbot_apache._internal.configurator.logger") as mock_log:
+            self.config.restart()
+        self.assertEqual(mock_probe.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertTrue(mock_log.info.called)
+        self.assertFalse(mock_log.warning.called)
+        self.assertEqual(self.config._readiness_probes, [])
+
+    @mock.patch("certbot_apache._internal.configurator.time")
+    @mock.patch("certbot_apache._internal.configurator.acme_crypto_util.probe_sni")
+    @mock.patch("certbot_apache._internal.configurator.util.run_script")
+    def test_restart_readiness_timeout(self, _, mock_probe, mock_time):
+        self.config.config.apache_readiness_timeout = 10
+        # pylint: disable=protected-access
+        self.config._readiness_probes = [("example.org", "localhost", 443, 42)]
+        mock_time.time.side_effect = [0, 5, 11]
+        mock_probe.return_value = mock.MagicMock(
+            get_serial_number=mock.MagicMock(return_value=41))
+
+        with mock.patch("certbot_apache._internal.configurator.logger") as mock_log:
+            self.config.restart()
+        self.assertEqual(mock_probe.call_count, 2)
+        self.assertTrue(mock_log.warning.called)
+
+    def test_recovery_routine_drops_readiness_probes(self):
+        # pylint: disable=protected-access
+        self.config._readiness_probes = [("example.org", "localhost", 443, 42)]
+        self.config.recovery_routine()
+        self.assertEqual(self.config._readiness_probes, [])
+
     @mock.patch("certbot.util.run_script")
     def test_config_test(self, _):
         self.config.config_test()
@@ -1470,6 +1538,14 @@ class MultipleVhostsTest(util.ApacheTest):
         self.assertEqual(vhs[1], mock_vhost)
 
 
+    @mock.patch("certbot_apache._internal.configurator.filesystem.realpath")
+    def test_get_virtual_hosts_realpath_cached(self, mock_realpath):
+        mock_realpath.side_effect = lambda path: path
+        vhs = self.config.get_virtual_hosts()
+        filepaths = set(vh.filep for vh in vhs)
+        self.assertEqual(mock_realpath.call_count, len(filepaths))
+
+
 class AugeasVhostsTest(util.ApacheTest):
     """Test vhosts with illegal names dependent on augeas version."""
     # pylint: disable=protected-access
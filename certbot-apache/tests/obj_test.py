@@ -137,5 +137,81 @@ class AddrTest(unittest.TestCase):
         self.assertNotEqual(self.addr, self.addr1)
 
 
+class VirtualHostIndexTest(unittest.TestCase):
+    """Test obj.VirtualHostIndex."""
+
+    def setUp(self):
+        from certbot_apache._internal.obj import Addr
+        from certbot_apache._internal.obj import VirtualHost
+        from certbot_apache._internal.obj import VirtualHostIndex
+
+        self.exact = VirtualHost(
+            "fp1", "vhp1", {Addr.fromstring("*:80")}, False, False,
+            "Example.com", {"www.example.com"})
+        self.wildcard = VirtualHost(
+            "fp2", "vhp2", {Addr.fromstring("*:443")}, True, False,
+            None, {"*.example.com"})
+        self.by_addr = VirtualHost(
+            "fp3", "vhp3", {Addr.fromstring("10.0.0.1:80")}, False, False,
+            "other.org", {"[bracket].example.com"})
+        self.vhosts = [self.exact, self.wildcard, self.by_addr]
+        self.index = VirtualHostIndex(self.vhosts)
+
+    def test_candidates_exact(self):
+        self.assertEqual(self.index.candidates("Example.com"), [self.exact])
+        self.assertEqual(self.index.candidates("other.org"), [self.by_addr])
+
+    def test_candidates_case_insensitive(self):
+        self.assertEqual(self.index.candidates("example.COM"), [self.exact])
+
+    def test_candidates_wildcard(self):
+        self.assertEqual(self.index.candidates("www.example.com"),
+                         [self.exact, self.wildcard])
+        self.assertEqual(self.index.candidates("a.b.example.com"),
+                         [self.wildcard])
+        self.assertEqual(self.index.candidates("example.org"), [])
+
+    def test_candidates_brackets_only_exact(self):
+        self.assertEqual(self.index.candidates("b.example.com"), [self.wildcard])
+        self.assertEqual(self.index.candidates("[bracket].example.com"),
+                         [self.wildcard, self.by_addr])
+
+    def test_candidates_addr(self):
+        self.assertEqual(self.index.candidates("10.0.0.1"), [self.by_addr])
+
+    def test_wildcard_candidates(self):
+        self.assertEqual(
+            sorted(name for name, _ in self.index.wildcard_candidates("*.example.com")),
+            ["*.example.com", "[bracket].example.com", "www.example.com"])
+
+    def test_is_current_appended(self):
+        from certbot_apache._internal.obj import VirtualHost
+        new = VirtualHost("fp4", "vhp4", set(), True, False, "new.example.net")
+        self.vhosts.append(new)
+        self.assertTrue(self.index.is_current(self.vhosts))
+        self.assertTrue(self.index.contains(new))
+        self.assertEqual(self.index.candidates("new.example.net"), [new])
+
+    def test_is_current_replaced(self):
+        self.assertFalse(self.index.is_current(list(self.vhosts)))
+        self.vhosts.pop()
+        self.assertFalse(self.index.is_current(self.vhosts))
+
+    def test_update(self):
+        self.exact.aliases.add("alias.example.net")
+        self.exact.name = None
+        self.index.update(self.exact)
+        self.assertEqual(self.index.candidates("alias.example.net"), [self.exact])
+        self.assertEqual(self.index.candidates("Example.com"), [])
+        self.assertEqual(self.index.candidates("www.example.com"),
+                         [self.exact, self.wildcard])
+
+    def test_update_unknown(self):
+        from certbot_apache._internal.obj import VirtualHost
+        unknown = VirtualHost("fp5", "vhp5", set(), True, False, "unknown.org")
+        self.index.update(unknown)
+        self.assertEqual(self.index.candidates("unknown.org"), [])
+
+
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
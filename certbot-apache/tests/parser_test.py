@@ -76,6 +76,17 @@ class BasicParserTest(util.ParserTest):
         self.assertEqual(len(test), 1)
         self.assertEqual(len(test2), 8)
 
+    def test_find_dirs(self):
+        found = self.parser.find_dirs(["Listen", "DocumentRoot"])
+
+        self.assertEqual(found["listen"], self.parser.find_dir("Listen"))
+        self.assertEqual(found["documentroot"],
+                         self.parser.find_dir("documentroot"))
+
+    def test_find_dirs_not_found(self):
+        found = self.parser.find_dirs(["Nonexistent"], exclude=False)
+        self.assertEqual(found, {"nonexistent": []})
+
     def test_add_dir(self):
         aug_default = "/files" + self.parser.loc["default"]
         self.parser.add_dir(aug_default, "AddDirective", "test")
@@ -400,5 +411,24 @@ class ParserInitTest(util.ApacheTest):
         self.assertEqual(parser.root, self.config_path)
 
 
+class CaseITest(unittest.TestCase):
+    """Tests for the memoized case insensitive regex helpers."""
+
+    def test_case_i(self):
+        from certbot_apache._internal.parser import case_i
+        self.assertEqual(case_i("SSL-Engine"), case_i("SSL-Engine"))
+        self.assertTrue(case_i("SSL-Engine") is case_i("SSL-Engine"))
+        self.assertEqual(case_i("Ab1"), "[Aa][Bb]1")
+
+    def test_directives_regex(self):
+        from certbot_apache._internal.parser import directives_regex
+        regex = directives_regex(("ServerName", "ServerAlias"))
+        self.assertEqual(regex.count("|"), 3)
+        self.assertTrue(regex.startswith("([Ss][Ee][Rr][Vv][Ee][Rr][Nn][Aa][Mm][Ee])|"))
+        self.assertTrue(regex.endswith(
+            "|([Ii][Nn][Cc][Ll][Uu][Dd][Ee][Oo][Pp][Tt][Ii][Oo][Nn][Aa][Ll])"))
+        self.assertTrue(regex is directives_regex(("ServerName", "ServerAlias")))
+
+
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
@@ -100,6 +100,7 @@ def get_apache_configurator(
         apache_le_vhost_ext="-le-ssl.conf",
         apache_challenge_location=config_path,
         apache_enmod=None,
+        apache_readiness_timeout=0,
         backup_dir=backups,
         config_dir=config_dir,
         http01_port=80,
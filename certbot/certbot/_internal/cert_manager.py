@@ -1,5 +1,6 @@
 """Tools for managing certificates."""
 import datetime
+import json
 import logging
 import re
 import traceback
@@ -7,12 +8,15 @@ import traceback
 import pytz
 import zope.component
 
+from acme.magic_typing import Any
 from acme.magic_typing import List
 from certbot import crypto_util
 from certbot import errors
 from certbot import interfaces
 from certbot import ocsp
 from certbot import util
+from certbot._internal import constants
+from certbot._internal import lineage_index
 from certbot._internal import storage
 from certbot.compat import os
 from certbot.display import util as display_util
@@ -35,8 +39,12 @@ def update_live_symlinks(config):
     :type config: :class:`certbot._internal.configuration.NamespaceConfig`
 
     """
-    for renewal_file in storage.renewal_conf_files(config):
-        storage.RenewableCert(renewal_file, config, update_symlinks=True)
+    # The symlinks are checked while being updated
+    lineages = [storage.RenewableCert(renewal_file, config, check_symlinks=False)
+                for renewal_file in storage.renewal_conf_files(config)]
+    failures = storage.update_symlinks_bulk(config, lineages)
+    if failures:
+        raise failures[0][1]
 
 def rename_lineage(config):
     """Rename the specified lineage to the new name.
@@ -69,24 +77,25 @@ def rename_lineage(config):
 def certificates(config):
     """Display information about certs configured with Certbot
 
+    With ``--output-format json``, each certificate is printed as a JSON
+    object on its own line as soon as the page of certificates it belongs
+    to has been checked.
+
     :param config: Configuration.
     :type config: :class:`certbot._internal.configuration.NamespaceConfig`
     """
-    parsed_certs = []
-    parse_failures = []
-    for renewal_file in storage.renewal_conf_files(config):
-        try:
-            renewal_candidate = storage.RenewableCert(renewal_file, config)
-            crypto_util.verify_renewable_cert(renewal_candidate)
-            parsed_certs.append(renewal_candidate)
-        except Exception as e:  # pylint: disable=broad-except
-            logger.warning("Renewal configuration file %s produced an "
-                           "unexpected error: %s. Skipping.", renewal_file, e)
-            logger.debug("Traceback was:\n%s", traceback.format_exc())
-            parse_failures.append(renewal_file)
+    parsed_certs = []  # type: List[storage.RenewableCert]
+    parse_failures = []  # type: List[str]
+    for page_certs, page_failures in _certificate_pages(config):
+        if config.output_format == "json":
+            _print_json_lines(config, page_certs, page_failures)
+        else:
+            parsed_certs.extend(page_certs)
+            parse_failures.extend(page_failures)
 
-    # Describe all the certs
-    _describe_certs(config, parsed_certs, parse_failures)
+    if config.output_format != "json":
+        # Describe all the certs
+        _describe_certs(config, parsed_certs, parse_failures)
 
 
 def delete(config):
@@ -174,7 +183,16 @@ def find_duplicative_certs(config, domains):
                 subset_names_cert = candidate_lineage
         return (identical_names_cert, subset_names_cert)
 
-    return _search_lineages(config, update_certs_for_domain_matches, (None, None))
+    index, lineages = _refresh_lineage_index(config)
+    # Only lineages sharing a domain with domains can be identical or a subset
+    sharing = index.lineages_sharing_names(domains)
+    matches = (None, None)
+    for candidate_lineage in lineages:
+        if candidate_lineage.lineagename in sharing or candidate_lineage.lineagename not in index:
+            matches = update_certs_for_domain_matches(candidate_lineage, matches)
+    return tuple(lineage_for_certname(config, match.lineagename)
+                 if isinstance(match, lineage_index.LineageSummary) else match
+                 for match in matches)
 
 
 def _archive_files(candidate_lineage, filetype):
@@ -260,25 +278,29 @@ def match_and_check_overlaps(cli_config, acceptable_matches, match_func, rv_func
     return matched
 
 
-def human_readable_cert_info(config, cert, skip_filter_checks=False):
-    """ Returns a human readable description of info about a RenewableCert object"""
-    certinfo = []
-    checker = ocsp.RevocationChecker()
-
+def _matches_filters(config, cert, skip_filter_checks=False):
+    """Is cert selected by the --cert-name and --domains filters?"""
     if config.certname and cert.lineagename != config.certname and not skip_filter_checks:
-        return ""
+        return False
     if config.domains and not set(config.domains).issubset(cert.names()):
+        return False
+    return True
+
+
+def human_readable_cert_info(config, cert, skip_filter_checks=False, revoked=None):
+    """ Returns a human readable description of info about a RenewableCert object
+
+    :param bool revoked: OCSP status of cert if it was already checked,
+        otherwise None to check it now
+
+    """
+    certinfo = []
+
+    if not _matches_filters(config, cert, skip_filter_checks):
         return ""
     now = pytz.UTC.fromutc(datetime.datetime.utcnow())
 
-    reasons = []
-    if cert.is_test_cert:
-        reasons.append('TEST_CERT')
-    if cert.target_expiry <= now:
-        reasons.append('EXPIRED')
-    elif checker.ocsp_revoked(cert):
-        reasons.append('REVOKED')
-
+    reasons = _invalid_reasons(config, cert, now, revoked)
     if reasons:
         status = "INVALID: " + ", ".join(reasons)
     else:
@@ -354,11 +376,142 @@ def _report_lines(msgs):
     return "  " + "\n  ".join(str(msg) for msg in msgs)
 
 
+def _invalid_reasons(config, cert, now, revoked=None):
+    """Why is cert invalid?
+
+    :param bool revoked: OCSP status of cert if it was already checked,
+        otherwise None to check it now
+
+    :returns: the reasons, none if cert is valid
+    :rtype: `list` of `str`
+    """
+    reasons = []
+    if cert.is_test_cert:
+        reasons.append('TEST_CERT')
+    if cert.target_expiry <= now:
+        reasons.append('EXPIRED')
+    else:
+        if revoked is None:
+            checker = ocsp.RevocationChecker(cache_dir=config.ocsp_cache_dir)
+            revoked = checker.ocsp_revoked(cert)
+        if revoked:
+            reasons.append('REVOKED')
+    return reasons
+
+
+def _check_revocations(config, certs, now):
+    """Check the OCSP status of the unexpired certs concurrently
+
+    :returns: the status of each checked cert, by the cert's id
+    :rtype: dict
+    """
+    to_check = [cert for cert in certs if cert.target_expiry > now]
+    checker = ocsp.RevocationChecker(cache_dir=config.ocsp_cache_dir)
+    statuses = checker.ocsp_revoked_batch(to_check)
+    return dict(zip((id(cert) for cert in to_check), statuses))
+
+
+def _matches_listing_filters(config, cert, now):
+    """Is cert selected by all the filters of the certificates subcommand?"""
+    if not _matches_filters(config, cert):
+        return False
+    if config.expires_within is not None:
+        horizon = now + datetime.timedelta(days=config.expires_within)
+        if cert.target_expiry > horizon:
+            return False
+    if config.filter_key_type and cert.private_key_type.lower() != config.filter_key_type:
+        return False
+    return True
+
+
+def _certificate_pages(config):
+    """Load the certs selected by the certificates filters, a page at a time.
+
+    Lineages whose up to date entry in the lineage index doesn't match
+    the filters are skipped without being loaded.
+
+    :returns: pairs of the parsed certs and of the renewal configuration
+        files that couldn't be parsed, for each page
+    :rtype: iterator of `tuple`
+    """
+    now = pytz.UTC.fromutc(datetime.datetime.utcnow())
+    index = lineage_index.LineageIndex(config)
+    lineagenames = []
+    parsed_certs = []  # type: List[storage.RenewableCert]
+    parse_failures = []  # type: List[str]
+    for renewal_file in storage.renewal_conf_files(config):
+        lineagename = storage.lineagename_for_filename(renewal_file)
+        lineagenames.append(lineagename)
+        summary = index.get(lineagename, renewal_file)
+        if summary is not None and not _matches_listing_filters(config, summary, now):
+            continue
+        try:
+            # verify_renewable_cert fails on missing links and files
+            renewal_candidate = storage.RenewableCert(renewal_file, config,
+                                                      check_symlinks=False)
+            crypto_util.verify_renewable_cert(renewal_candidate)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Renewal configuration file %s produced an "
+                           "unexpected error: %s. Skipping.", renewal_file, e)
+            logger.debug("Traceback was:\n%s", traceback.format_exc())
+            parse_failures.append(renewal_file)
+        else:
+            if summary is None:
+                index.update(renewal_candidate)
+            if _matches_listing_filters(config, renewal_candidate, now):
+                parsed_certs.append(renewal_candidate)
+        if len(parsed_certs) + len(parse_failures) >= constants.CERTIFICATES_PAGE_SIZE:
+            yield parsed_certs, parse_failures
+            parsed_certs, parse_failures = [], []
+    index.prune(lineagenames)
+    index.save()
+    if parsed_certs or parse_failures:
+        yield parsed_certs, parse_failures
+
+
+def _print_json_lines(config, parsed_certs, parse_failures):
+    """Print a JSON object describing each cert and each parse failure"""
+    now = pytz.UTC.fromutc(datetime.datetime.utcnow())
+    revoked = _check_revocations(config, parsed_certs, now)
+    lines = []
+    for cert in parsed_certs:
+        reasons = _invalid_reasons(config, cert, now, revoked.get(id(cert)))
+        lines.append(json.dumps({
+            "name": cert.lineagename,
+            "serial": format(crypto_util.get_serial_from_cert(cert.cert_path), 'x'),
+            "key_type": cert.private_key_type,
+            "domains": cert.names(),
+            "expiry": cert.target_expiry.isoformat(),
+            "valid": not reasons,
+            "invalid_reasons": reasons,
+            "cert_path": cert.cert_path,
+            "chain_path": cert.chain_path,
+            "fullchain_path": cert.fullchain_path,
+            "key_path": cert.key_path,
+        }, sort_keys=True))
+    for renewal_file in parse_failures:
+        lines.append(json.dumps({
+            "name": storage.lineagename_for_filename(renewal_file),
+            "renewal_file": renewal_file,
+            "valid": False,
+            "invalid_reasons": ["PARSE_ERROR"],
+        }, sort_keys=True))
+    if lines:
+        disp = zope.component.getUtility(interfaces.IDisplay)
+        disp.notification("\n".join(lines), pause=False, wrap=False, decorate=False)
+
+
 def _report_human_readable(config, parsed_certs):
     """Format a results report for a parsed cert"""
+    # Check the OCSP status of the certificates to be reported concurrently
+    now = pytz.UTC.fromutc(datetime.datetime.utcnow())
+    revoked = _check_revocations(
+        config, [cert for cert in parsed_certs if _matches_filters(config, cert)], now)
+
     certinfo = []
     for cert in parsed_certs:
-        certinfo.append(human_readable_cert_info(config, cert))
+        certinfo.append(human_readable_cert_info(config, cert,
+                                                 revoked=revoked.get(id(cert))))
     return "\n".join(certinfo)
 
 
@@ -372,7 +525,9 @@ def _describe_certs(config, parsed_certs, parse_failures):
         notify("No certs found.")
     else:
         if parsed_certs:
-            match = "matching " if config.certname or config.domains else ""
+            match = "matching " if (config.certname or config.domains or
+                                    config.expires_within is not None or
+                                    config.filter_key_type) else ""
             notify("Found the following {0}certs:".format(match))
             notify(_report_human_readable(config, parsed_certs))
         if parse_failures:
@@ -396,17 +551,41 @@ def _search_lineages(cli_config, func, initial_rv, *args):
 
     :returns: Whatever was specified by `func` if a match is found.
     """
+    rv = initial_rv
+    for candidate_lineage in _refresh_lineage_index(cli_config)[1]:
+        rv = func(candidate_lineage, rv, *args)
+    return rv
+
+
+def _refresh_lineage_index(cli_config):
+    """Bring the lineage index up to date with the lineages in the config directory.
+
+    :param `configuration.NamespaceConfig` cli_config: parsed command line arguments
+
+    :returns: the index, and the unbroken lineages in the order of their
+        renewal configuration files. Lineages are described by their
+        `.lineage_index.LineageSummary`, or by a `.storage.RenewableCert`
+        if they couldn't be indexed.
+    :rtype: `tuple`
+    """
     configs_dir = cli_config.renewal_configs_dir
     # Verify the directory is there
     util.make_or_verify_dir(configs_dir, mode=0o755)
 
-    rv = initial_rv
+    index = lineage_index.LineageIndex(cli_config)
+    lineages = []  # type: List[Any]
     for renewal_file in storage.renewal_conf_files(cli_config):
         try:
-            candidate_lineage = storage.RenewableCert(renewal_file, cli_config)
+            lineagename = storage.lineagename_for_filename(renewal_file)
+            candidate_lineage = index.get(lineagename, renewal_file)
+            if candidate_lineage is None:
+                candidate_lineage = storage.RenewableCert(renewal_file, cli_config)
+                index.update(candidate_lineage)
         except (errors.CertStorageError, IOError):
             logger.debug("Renewal conf file %s is broken. Skipping.", renewal_file)
             logger.debug("Traceback was:\n%s", traceback.format_exc())
             continue
-        rv = func(candidate_lineage, rv, *args)
-    return rv
+        lineages.append(candidate_lineage)
+    index.prune(lineage.lineagename for lineage in lineages)
+    index.save()
+    return index, lineages
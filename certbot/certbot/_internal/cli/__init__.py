@@ -410,6 +410,21 @@ def prepare_and_parse_args(plugins, args, detect_defaults=False):
         "renew", "--no-random-sleep-on-renew", action="store_false",
         default=flag_default("random_sleep_on_renew"), dest="random_sleep_on_renew",
         help=argparse.SUPPRESS)
+    helpful.add(
+        "renew", "--renewal-store", action="store_true",
+        default=flag_default("renewal_store"),
+        help="Keep a copy of the renewal configuration of all certificates in a "
+             "SQLite database in the config directory, and read it from there "
+             "instead of parsing every renewal configuration file. Files that "
+             "were modified are imported again.")
+    helpful.add(
+        "renew", "--max-concurrent-renewals", type=int, metavar="N",
+        default=flag_default("max_concurrent_renewals"),
+        help="Renew up to N certificates at the same time, so that the "
+             "challenges of a certificate are validated while other "
+             "certificates are being requested. Certificates using the "
+             "apache, nginx, standalone or manual plugins are still renewed "
+             "one at a time. (default: %(default)s)")
     helpful.add(
         "renew", "--deploy-hook", action=_DeployHookAction,
         help='Command to be run in a shell once for each successfully'
@@ -66,6 +66,7 @@ class HelpfulArgumentParser(object):
             "rollback": main.rollback,
             "everything": main.run,
             "update_symlinks": main.update_symlinks,
+            "fill_key_pool": main.fill_key_pool,
             "certificates": main.certificates,
             "delete": main.delete,
             "enhance": main.enhance,
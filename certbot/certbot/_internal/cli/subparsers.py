@@ -33,6 +33,26 @@ def _create_subparsers(helpful):
                 "--csr", default=flag_default("csr"), type=read_file,
                 help="Path to a Certificate Signing Request (CSR) in DER or PEM format."
                 " Currently --csr only works with the 'certonly' subcommand.")
+    helpful.add("certificates",
+                "--output-format", choices=["human", "json"],
+                default=flag_default("output_format"),
+                help="Format of the list of certificates. 'json' prints one JSON object "
+                     "per certificate, on its own line, as soon as it has been checked. "
+                     "(default: human)")
+    helpful.add("certificates",
+                "--expires-within", type=int, metavar="DAYS",
+                default=flag_default("expires_within"),
+                help="Only list the certificates expiring within DAYS days.")
+    helpful.add("certificates",
+                "--filter-key-type", choices=["rsa", "ecdsa"],
+                default=flag_default("filter_key_type"),
+                help="Only list the certificates whose private key is of this type.")
+    helpful.add("fill_key_pool",
+                "--key-pool-size", type=int, metavar="N",
+                default=flag_default("key_pool_size"),
+                help="Number of keys of the kind selected by --key-type, --rsa-key-size "
+                     "and --elliptic-curve to keep in the key pool. (default: {0})".format(
+                         flag_default("key_pool_size")))
     helpful.add("revoke",
                 "--reason", dest="reason",
                 choices=CaseInsensitiveList(sorted(constants.REVOCATION_REASONS,
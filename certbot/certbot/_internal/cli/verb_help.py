@@ -93,6 +93,13 @@ VERB_HELP = [
                   os.path.join(flag_default("config_dir"), "live"))),
         "usage": "\n\n  certbot update_symlinks [options]\n\n"
     }),
+    ("fill_key_pool", {
+        "short": "Generate private keys ahead of time for new certificates",
+        "opts": ("Generates private keys and keeps them in {0}, where they are used instead "
+                 "of generating a new key when a certificate is obtained".format(
+                  os.path.join(flag_default("config_dir"), "key-pool"))),
+        "usage": "\n\n  certbot fill_key_pool [--key-pool-size N] [options]\n\n"
+    }),
     ("enhance", {
         "short": "Add security enhancements to your existing configuration",
         "opts": ("Helps to harden the TLS configuration by adding security enhancements "
@@ -2,6 +2,7 @@
 import datetime
 import logging
 import platform
+import threading
 
 from cryptography.hazmat.backends import default_backend
 # See https://github.com/pyca/cryptography/issues/4275
@@ -14,8 +15,11 @@ from acme import client as acme_client
 from acme import crypto_util as acme_crypto_util
 from acme import errors as acme_errors
 from acme import messages
+from acme.magic_typing import Any
+from acme.magic_typing import Dict
 from acme.magic_typing import List
 from acme.magic_typing import Optional
+from acme.magic_typing import Tuple
 import certbot
 from certbot import crypto_util
 from certbot import errors
@@ -27,6 +31,7 @@ from certbot._internal import cli
 from certbot._internal import constants
 from certbot._internal import eff
 from certbot._internal import error_handler
+from certbot._internal import key_pool
 from certbot._internal import storage
 from certbot._internal.plugins import selection as plugin_selection
 from certbot.compat import os
@@ -40,7 +45,46 @@ def acme_from_config_key(config, key, regr=None):
     # TODO: Allow for other alg types besides RS256
     net = acme_client.ClientNetwork(key, account=regr, verify_ssl=(not config.no_verify_ssl),
                                     user_agent=determine_user_agent(config))
-    return acme_client.BackwardsCompatibleClientV2(net, key, config.server)
+    directory_cache = acme_client.DirectoryCache(config.acme_directory_cache_dir)
+    return acme_client.BackwardsCompatibleClientV2(net, key, config.server,
+                                                   directory_cache=directory_cache)
+
+
+class ACMEClientCache(object):
+    """ACME clients shared by the lineages renewed in a single run.
+
+    Building an ACME client opens a new HTTP session and fetches the
+    server's directory, so lineages renewed with the same account reuse
+    the client, its connections and its unused nonces.
+
+    """
+    def __init__(self):
+        # Clients by server URL, account ID and whether SSL is verified
+        self._clients = {}  # type: Dict[Tuple[str, str, bool], Any]
+        self._lock = threading.Lock()
+
+    def get(self, config, account_):
+        """Returns the ACME client to use with account_ for config.
+
+        :param config: Configuration object
+        :type config: interfaces.IConfig
+        :param account_: the account the client authenticates as
+        :type account_: certbot._internal.account.Account
+
+        :returns: a client built by `acme_from_config_key`
+        :rtype: acme.client.BackwardsCompatibleClientV2
+
+        """
+        key = (config.server, account_.id, not config.no_verify_ssl)
+        with self._lock:
+            acme = self._clients.get(key)
+            if acme is None:
+                acme = acme_from_config_key(config, account_.key, account_.regr)
+                self._clients[key] = acme
+                return acme
+        # The user agent names the plugins used by the lineage
+        acme.client.net.user_agent = determine_user_agent(config)
+        return acme
 
 
 def determine_user_agent(config):
@@ -363,6 +407,8 @@ class Client(object):
                            data=acme_crypto_util.make_csr(
                                key.pem, domains, self.config.must_staple))
         else:
+            key = key or key_pool.take(
+                self.config, self.config.key_type, key_size, elliptic_curve)
             key = key or crypto_util.init_save_key(
                 key_size=key_size,
                 key_dir=self.config.key_dir,
@@ -535,6 +581,7 @@ class Client(object):
 
         msg = ("Unable to install the certificate")
         with error_handler.ErrorHandler(self._recovery_routine_with_msg, msg):
+            self._begin_installer_transaction()
             for dom in domains:
                 self.installer.deploy_cert(
                     domain=dom, cert_path=os.path.abspath(cert_path),
@@ -544,6 +591,7 @@ class Client(object):
                 self.installer.save()  # needed by the Apache plugin
 
             self.installer.save("Deployed ACME Certificate")
+            self._commit_installer_transaction()
 
         msg = ("We were unable to install your certificate, "
                "however, we successfully restored your "
@@ -577,6 +625,7 @@ class Client(object):
             ("uir", "ensure-http-header", "Upgrade-Insecure-Requests"),)
         supported = self.installer.supported_enhancements()
 
+        self._begin_installer_transaction()
         for config_name, enhancement_name, option in enhancement_info:
             config_value = getattr(self.config, config_name)
             if enhancement_name in supported:
@@ -590,6 +639,11 @@ class Client(object):
                     "Option %s is not supported by the selected installer. "
                     "Skipping enhancement.", config_name)
 
+        msg = ("We were unable to set up enhancements for your server, "
+               "however, we successfully installed your certificate.")
+        with error_handler.ErrorHandler(self._recovery_routine_with_msg, msg):
+            self._commit_installer_transaction()
+
         msg = ("We were unable to restart web server")
         if enhanced:
             with error_handler.ErrorHandler(self._rollback_and_restart, msg):
@@ -630,6 +684,21 @@ class Client(object):
 
             self.installer.save("Add enhancement %s" % (enhancement))
 
+    def _begin_installer_transaction(self):
+        """Starts grouping the installer's saves, if the installer supports it.
+
+        Errors before the transaction is committed are expected to be handled
+        by the installer's recovery routine, which discards the transaction.
+
+        """
+        if isinstance(self.installer, interfaces.TransactionalInstaller):
+            self.installer.begin_transaction()
+
+    def _commit_installer_transaction(self):
+        """Saves the changes grouped since _begin_installer_transaction."""
+        if isinstance(self.installer, interfaces.TransactionalInstaller):
+            self.installer.commit_transaction()
+
     def _recovery_routine_with_msg(self, success_msg):
         """Calls the installer's recovery routine and prints success_msg
 
@@ -74,6 +74,10 @@ class NamespaceConfig(object):
         return os.path.join(
             self.namespace.config_dir, constants.ACCOUNTS_DIR, server_path)
 
+    @property
+    def acme_directory_cache_dir(self):  # pylint: disable=missing-function-docstring
+        return os.path.join(self.namespace.work_dir, constants.ACME_DIRECTORY_CACHE_DIR)
+
     @property
     def backup_dir(self):  # pylint: disable=missing-function-docstring
         return os.path.join(self.namespace.work_dir, constants.BACKUP_DIR)
@@ -90,6 +94,14 @@ class NamespaceConfig(object):
     def key_dir(self):  # pylint: disable=missing-function-docstring
         return os.path.join(self.namespace.config_dir, constants.KEY_DIR)
 
+    @property
+    def key_pool_dir(self):  # pylint: disable=missing-function-docstring
+        return os.path.join(self.namespace.config_dir, constants.KEY_POOL_DIR)
+
+    @property
+    def ocsp_cache_dir(self):  # pylint: disable=missing-function-docstring
+        return os.path.join(self.namespace.work_dir, constants.OCSP_CACHE_DIR)
+
     @property
     def temp_checkpoint_dir(self):  # pylint: disable=missing-function-docstring
         return os.path.join(
@@ -73,6 +73,8 @@ CLI_DEFAULTS = dict(
     reuse_key=False,
     disable_renew_updates=False,
     random_sleep_on_renew=True,
+    renewal_store=False,
+    max_concurrent_renewals=1,
     eab_hmac_key=None,
     eab_kid=None,
 
@@ -83,6 +85,10 @@ CLI_DEFAULTS = dict(
     csr=None,
     reason=0,
     delete_after_revoke=None,
+    output_format="human",
+    expires_within=None,
+    filter_key_type=None,
+    key_pool_size=20,
     rollback_checkpoints=1,
     init=False,
     prepare=False,
@@ -181,12 +187,30 @@ IN_PROGRESS_DIR = "IN_PROGRESS"
 KEY_DIR = "keys"
 """Directory (relative to `IConfig.config_dir`) where keys are saved."""
 
+KEY_POOL_DIR = "key-pool"
+"""Directory (relative to `IConfig.config_dir`) where pregenerated keys are kept."""
+
 LIVE_DIR = "live"
 """Live directory, relative to `IConfig.config_dir`."""
 
 TEMP_CHECKPOINT_DIR = "temp_checkpoint"
 """Temporary checkpoint directory (relative to `IConfig.work_dir`)."""
 
+LINEAGE_INDEX_FILENAME = "lineage-index.json"
+"""Index of the lineages' metadata, relative to `IConfig.config_dir`."""
+
+RENEWAL_STORE_FILENAME = "renewal.sqlite3"
+"""Renewal configuration database, relative to `IConfig.config_dir`."""
+
+CERTIFICATES_PAGE_SIZE = 50
+"""Number of certificates loaded and checked at once by `certbot certificates`."""
+
+ACME_DIRECTORY_CACHE_DIR = "acme-directories"
+"""Directory (relative to `IConfig.work_dir`) where ACME directories are cached."""
+
+OCSP_CACHE_DIR = "ocsp"
+"""Directory (relative to `IConfig.work_dir`) where OCSP responses are cached."""
+
 RENEWAL_CONFIGS_DIR = "renewal"
 """Renewal configs directory, relative to `IConfig.config_dir`."""
 
@@ -2,6 +2,7 @@
 from __future__ import print_function
 
 import logging
+import threading
 
 from acme.magic_typing import List
 from acme.magic_typing import Set
@@ -14,6 +15,9 @@ from certbot.plugins import util as plug_util
 
 logger = logging.getLogger(__name__)
 
+# Protects the hooks run or saved by lineages renewed concurrently
+_lock = threading.Lock()
+
 
 def validate_hooks(config):
     """Check hook commands are executable."""
@@ -90,11 +94,12 @@ def _run_pre_hook_if_necessary(command):
     :param str command: pre-hook to be run
 
     """
-    if command in executed_pre_hooks:
-        logger.info("Pre-hook command already run, skipping: %s", command)
-    else:
-        _run_hook("pre-hook", command)
-        executed_pre_hooks.add(command)
+    with _lock:
+        if command in executed_pre_hooks:
+            logger.info("Pre-hook command already run, skipping: %s", command)
+        else:
+            _run_hook("pre-hook", command)
+            executed_pre_hooks.add(command)
 
 
 def post_hook(config):
@@ -140,8 +145,9 @@ def _run_eventually(command):
     :param str command: post-hook to register to be run
 
     """
-    if command not in post_hooks:
-        post_hooks.append(command)
+    with _lock:
+        if command not in post_hooks:
+            post_hooks.append(command)
 
 
 def run_saved_post_hooks():
@@ -0,0 +1,202 @@
+"""Pool of private keys generated ahead of the certificates using them.
+
+Generating a large RSA key takes a noticeable amount of CPU time, which
+``certbot fill_key_pool`` spends ahead of time by storing fresh keys in
+`IConfig.key_pool_dir`, one subdirectory per key type and size or
+curve. When a certificate is obtained, a pooled key with the requested
+parameters is moved to `IConfig.key_dir` instead of generating a new
+one. Keys are written under a temporary name before being renamed into
+the pool, and taken by renaming them out of it, so concurrent Certbot
+processes never see a partial key nor use the same key twice.
+
+"""
+import binascii
+import collections
+import functools
+import logging
+import multiprocessing
+
+from acme.magic_typing import Iterable
+from acme.magic_typing import List
+from acme.magic_typing import Optional
+from acme.magic_typing import Tuple
+from certbot import crypto_util
+from certbot import util
+from certbot.compat import filesystem
+from certbot.compat import misc
+from certbot.compat import os
+
+logger = logging.getLogger(__name__)
+
+_KEY_SUFFIX = ".pem"
+
+
+def fill(cli_config, key_type, key_size, elliptic_curve, size):
+    # type: (...) -> int
+    """Generates keys until the pool holds size keys of the given kind.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+    :param str key_type: type of the keys, rsa or ecdsa
+    :param int key_size: size of the RSA keys
+    :param str elliptic_curve: curve of the ECDSA keys
+    :param int size: number of keys the pool should hold
+
+    :returns: number of generated keys
+    :rtype: int
+
+    """
+    directory = _make_pool_dir(cli_config, key_type, key_size, elliptic_curve)
+    generated = 0
+    while len(_pooled_keys(directory)) < size:
+        _add(directory, _generate(key_type, key_size, elliptic_curve))
+        generated += 1
+    return generated
+
+
+def take(cli_config, key_type, key_size, elliptic_curve):
+    # type: (...) -> Optional[util.Key]
+    """Moves a pooled key of the given kind to `IConfig.key_dir`.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+    :param str key_type: type of the key, rsa or ecdsa
+    :param int key_size: size of the RSA key
+    :param str elliptic_curve: curve of the ECDSA key
+
+    :returns: the saved key, or None if the pool has no such key
+    :rtype: :class:`certbot.util.Key` or None
+
+    """
+    directory = _pool_dir(cli_config, key_type, key_size, elliptic_curve)
+    names = _pooled_keys(directory)
+    if not names:
+        return None
+    util.make_or_verify_dir(cli_config.key_dir, 0o700, cli_config.strict_permissions)
+    key_f, key_path = util.unique_file(
+        os.path.join(cli_config.key_dir, "key-certbot.pem"), 0o600, "wb")
+    key_f.close()
+    for name in names:
+        try:
+            filesystem.replace(os.path.join(directory, name), key_path)
+        except OSError:
+            # Taken by another process in the meantime
+            continue
+        with open(key_path, "rb") as key_file:
+            key_pem = key_file.read()
+        logger.debug("Using pooled key %s: %s", name, key_path)
+        return util.Key(key_path, key_pem)
+    os.remove(key_path)
+    return None
+
+
+def key_kind(cli_config):
+    # type: (...) -> Tuple[str, int, Optional[str]]
+    """Returns the kind of key Certbot generates for cli_config.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+
+    :returns: key type, RSA key size and elliptic curve, which is None
+        for RSA keys
+    :rtype: tuple
+
+    """
+    key_type = cli_config.key_type
+    # key-type defaults to a list, but we are only handling 1 currently
+    if isinstance(key_type, list):
+        key_type = key_type[0]
+    elliptic_curve = cli_config.elliptic_curve if key_type == "ecdsa" else None
+    return key_type, cli_config.rsa_key_size, elliptic_curve
+
+
+class Prefetcher(object):
+    """Generates keys in worker processes and adds them to the pool.
+
+    Used when several certificates are about to be obtained, so that
+    their keys are generated on all the CPUs while Certbot waits for the
+    ACME server. Keys that aren't ready when a certificate is obtained
+    are generated as usual, and end up in the pool once they are.
+
+    """
+    def __init__(self, cli_config):
+        self.cli_config = cli_config
+        self._workers = None  # type: Optional[multiprocessing.pool.Pool]
+
+    def prefetch(self, kinds):
+        # type: (Iterable[Tuple[str, int, Optional[str]]]) -> None
+        """Starts generating the keys that aren't already in the pool.
+
+        :param kinds: kind of each key that is going to be taken, as
+            returned by `key_kind`
+
+        """
+        missing = []
+        for kind, number in collections.Counter(kinds).items():
+            number -= len(_pooled_keys(_pool_dir(self.cli_config, *kind)))
+            missing.extend([kind] * number)
+        # Certbot's frozen Windows executable can't start worker
+        # processes, and generating a single key in one isn't any faster
+        if not misc.POSIX_MODE or len(missing) < 2:
+            return
+        logger.debug("Generating %d keys in the background", len(missing))
+        self._workers = multiprocessing.Pool(min(len(missing), multiprocessing.cpu_count()))
+        for kind in missing:
+            directory = _make_pool_dir(self.cli_config, *kind)
+            self._workers.apply_async(
+                _generate, kind, callback=functools.partial(_add_quietly, directory))
+
+    def close(self):
+        # type: () -> None
+        """Stops generating keys."""
+        if self._workers is not None:
+            self._workers.terminate()
+            self._workers.join()
+            self._workers = None
+
+
+def _generate(key_type, key_size, elliptic_curve):
+    # type: (str, int, Optional[str]) -> bytes
+    return crypto_util.make_key(
+        bits=key_size, key_type=key_type, elliptic_curve=elliptic_curve or "secp256r1")
+
+
+def _add(directory, key_pem):
+    # type: (str, bytes) -> None
+    temp_f, temp_path = util.unique_file(
+        os.path.join(directory, "incoming.tmp"), 0o600, "wb")
+    with temp_f:
+        temp_f.write(key_pem)
+    name = binascii.hexlify(os.urandom(16)).decode("ascii") + _KEY_SUFFIX
+    filesystem.replace(temp_path, os.path.join(directory, name))
+
+
+def _add_quietly(directory, key_pem):
+    # type: (str, bytes) -> None
+    try:
+        _add(directory, key_pem)
+    except (IOError, OSError) as error:
+        logger.debug("Unable to add a key to the pool in %s: %s", directory, error)
+
+
+def _make_pool_dir(cli_config, key_type, key_size, elliptic_curve):
+    # type: (...) -> str
+    directory = _pool_dir(cli_config, key_type, key_size, elliptic_curve)
+    util.make_or_verify_dir(cli_config.key_pool_dir, 0o700, cli_config.strict_permissions)
+    util.make_or_verify_dir(directory, 0o700, cli_config.strict_permissions)
+    return directory
+
+
+def _pool_dir(cli_config, key_type, key_size, elliptic_curve):
+    # type: (...) -> str
+    if key_type == "ecdsa":
+        name = "ecdsa-" + (elliptic_curve or "secp256r1").lower()
+    else:
+        name = "{0}-{1}".format(key_type, key_size)
+    return os.path.join(cli_config.key_pool_dir, name)
+
+
+def _pooled_keys(directory):
+    # type: (str) -> List[str]
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return sorted(name for name in names if name.endswith(_KEY_SUFFIX))
@@ -0,0 +1,283 @@
+"""Persistent index of the metadata of certificate lineages.
+
+Searching lineages by domain names or file paths otherwise requires
+loading every renewal configuration file and certificate in the config
+directory. The index is updated by :mod:`certbot._internal.storage`
+whenever it changes a lineage, and each entry is checked against the
+renewal configuration file and the live certificate before being used,
+so lineages modified behind Certbot's back are simply indexed again.
+
+"""
+import calendar
+import collections
+import datetime
+import json
+import logging
+import threading
+
+import pytz
+
+from acme.magic_typing import Any
+from acme.magic_typing import Dict
+from acme.magic_typing import Iterable
+from acme.magic_typing import List
+from acme.magic_typing import Optional
+from acme.magic_typing import Set
+from certbot._internal import constants
+from certbot.compat import filesystem
+from certbot.compat import os
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Serializes the updates of lineages renewed concurrently
+_lock = threading.Lock()
+"""Version of the index file format, an index of another version is discarded."""
+
+
+class LineageSummary(object):
+    """Metadata of a lineage, as stored in the index.
+
+    Provides the read-only attributes of
+    :class:`certbot._internal.storage.RenewableCert` that are needed to
+    search lineages, without loading the lineage.
+
+    """
+    def __init__(self, lineagename, entry):
+        # type: (str, Dict[str, Any]) -> None
+        self.lineagename = lineagename
+        self.cert = entry["cert"]  # type: str
+        self.privkey = entry["privkey"]  # type: str
+        self.chain = entry["chain"]  # type: str
+        self.fullchain = entry["fullchain"]  # type: str
+        self.archive_dir = entry["archive_dir"]  # type: str
+        self.private_key_type = entry["key_type"]  # type: str
+        self.is_test_cert = entry["test_cert"]  # type: bool
+        self.target_expiry = pytz.UTC.localize(
+            datetime.datetime.utcfromtimestamp(entry["expiry"]))
+        self._names = entry["names"]  # type: List[str]
+
+    @property
+    def key_path(self):
+        """Duck type for self.privkey"""
+        return self.privkey
+
+    @property
+    def cert_path(self):
+        """Duck type for self.cert"""
+        return self.cert
+
+    @property
+    def chain_path(self):
+        """Duck type for self.chain"""
+        return self.chain
+
+    @property
+    def fullchain_path(self):
+        """Duck type for self.fullchain"""
+        return self.fullchain
+
+    def names(self):
+        """What are the subject names of this certificate?
+
+        :returns: the subject names
+        :rtype: `list` of `str`
+
+        """
+        return list(self._names)
+
+
+class LineageIndex(object):
+    """Index of the lineages found in the config directory.
+
+    :ivar str path: path of the index file
+
+    """
+    def __init__(self, cli_config):
+        """Loads the index of the lineages in cli_config.config_dir.
+
+        :param .NamespaceConfig cli_config: parsed command line arguments
+
+        """
+        self.path = os.path.join(cli_config.config_dir, constants.LINEAGE_INDEX_FILENAME)
+        self._entries = self._load()
+        self._dirty = False
+        self._by_domain = None  # type: Optional[Dict[str, Set[str]]]
+
+    def __contains__(self, lineagename):
+        return lineagename in self._entries
+
+    def _load(self):
+        # type: () -> Dict[str, Dict[str, Any]]
+        try:
+            with open(self.path) as index_file:
+                index = json.load(index_file)
+        except (IOError, OSError, ValueError) as error:
+            if os.path.exists(self.path):
+                logger.debug("Ignoring unreadable lineage index %s: %s", self.path, error)
+            return {}
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            logger.debug("Ignoring lineage index %s in an unknown format", self.path)
+            return {}
+        return index.get("lineages", {})
+
+    def get(self, lineagename, renewal_file):
+        # type: (str, str) -> Optional[LineageSummary]
+        """Returns the indexed metadata of a lineage, if it is up to date.
+
+        :param str lineagename: name of the lineage
+        :param str renewal_file: path to the lineage's renewal configuration
+
+        :returns: the lineage's metadata, or None if the lineage isn't
+            indexed or changed since it was
+        :rtype: LineageSummary or None
+
+        """
+        entry = self._entries.get(lineagename)
+        if entry is None or not _is_current(entry, renewal_file):
+            return None
+        try:
+            return LineageSummary(lineagename, entry)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def update(self, lineage):
+        """Indexes the current state of a lineage.
+
+        A lineage that can't be indexed is removed from the index.
+
+        :param lineage: the lineage to index
+        :type lineage: :class:`certbot._internal.storage.RenewableCert`
+
+        """
+        try:
+            entry = _entry_for(lineage)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.debug("Unable to index lineage %s: %s", lineage.lineagename, error)
+            self.remove(lineage.lineagename)
+        else:
+            self._entries[lineage.lineagename] = entry
+            self._dirty = True
+            self._by_domain = None
+
+    def remove(self, lineagename):
+        # type: (str) -> None
+        """Removes a lineage from the index.
+
+        :param str lineagename: name of the lineage
+
+        """
+        if self._entries.pop(lineagename, None) is not None:
+            self._dirty = True
+            self._by_domain = None
+
+    def prune(self, lineagenames):
+        # type: (Iterable[str]) -> None
+        """Removes the lineages that no longer exist from the index.
+
+        :param lineagenames: names of all existing lineages
+
+        """
+        for lineagename in set(self._entries) - set(lineagenames):
+            self.remove(lineagename)
+
+    def lineages_sharing_names(self, domains):
+        # type: (Iterable[str]) -> Set[str]
+        """Finds the indexed lineages whose certificates have any of domains.
+
+        :param domains: domain names to look up
+
+        :returns: names of the matching lineages
+        :rtype: `set` of `str`
+
+        """
+        if self._by_domain is None:
+            self._by_domain = collections.defaultdict(set)
+            for lineagename, entry in self._entries.items():
+                for domain in entry.get("names", []):
+                    self._by_domain[domain].add(lineagename)
+        lineagenames = set()  # type: Set[str]
+        for domain in set(domains):
+            lineagenames.update(self._by_domain.get(domain, ()))
+        return lineagenames
+
+    def save(self):
+        # type: () -> None
+        """Writes the index back to disk if it was modified."""
+        if not self._dirty:
+            return
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w") as index_file:
+                json.dump({"version": INDEX_VERSION, "lineages": self._entries},
+                          index_file, sort_keys=True)
+            filesystem.replace(temp_path, self.path)
+        except (IOError, OSError) as error:
+            logger.debug("Unable to write the lineage index %s: %s", self.path, error)
+            return
+        self._dirty = False
+
+
+def update(cli_config, lineage):
+    """Indexes the current state of a lineage.
+
+    Failures are logged and otherwise ignored, as the lineage is indexed
+    again the next time it is searched.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+    :param lineage: the lineage to index
+    :type lineage: :class:`certbot._internal.storage.RenewableCert`
+
+    """
+    with _lock:
+        index = LineageIndex(cli_config)
+        index.update(lineage)
+        index.save()
+
+
+def remove(cli_config, lineagename):
+    """Removes a lineage from the index.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+    :param str lineagename: name of the lineage
+
+    """
+    with _lock:
+        index = LineageIndex(cli_config)
+        index.remove(lineagename)
+        index.save()
+
+
+def _entry_for(lineage):
+    """Returns the index entry describing the current state of lineage."""
+    conf_path = lineage.configfile.filename
+    return {
+        "conf_mtime": os.path.getmtime(conf_path),
+        "conf_size": os.path.getsize(conf_path),
+        "cert_target": os.readlink(lineage.cert),
+        "cert_mtime": os.path.getmtime(lineage.cert),
+        "cert_size": os.path.getsize(lineage.cert),
+        "cert": lineage.cert,
+        "privkey": lineage.privkey,
+        "chain": lineage.chain,
+        "fullchain": lineage.fullchain,
+        "archive_dir": lineage.archive_dir,
+        "names": lineage.names(),
+        "key_type": lineage.private_key_type,
+        "test_cert": lineage.is_test_cert,
+        "expiry": calendar.timegm(lineage.target_expiry.utctimetuple()),
+    }
+
+
+def _is_current(entry, renewal_file):
+    """Is entry up to date with the lineage's files?"""
+    try:
+        cert = entry["cert"]
+        return (os.path.getmtime(renewal_file) == entry["conf_mtime"] and
+                os.path.getsize(renewal_file) == entry["conf_size"] and
+                os.readlink(cert) == entry["cert_target"] and
+                os.path.getmtime(cert) == entry["cert_mtime"] and
+                os.path.getsize(cert) == entry["cert_size"])
+    except (OSError, KeyError, TypeError):
+        return False
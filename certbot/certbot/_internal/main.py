@@ -25,6 +25,7 @@ from certbot._internal import configuration
 from certbot._internal import constants
 from certbot._internal import eff
 from certbot._internal import hooks
+from certbot._internal import key_pool
 from certbot._internal import log
 from certbot._internal import renewal
 from certbot._internal import reporter
@@ -631,7 +632,7 @@ def _delete_if_appropriate(config):
     cert_manager.delete(config)
 
 
-def _init_le_client(config, authenticator, installer):
+def _init_le_client(config, authenticator, installer, acme_clients=None):
     """Initialize Let's Encrypt Client
 
     :param config: Configuration object
@@ -641,6 +642,8 @@ def _init_le_client(config, authenticator, installer):
     :type authenticator: Optional[interfaces.IAuthenticator]
     :param installer: Installer object
     :type installer: interfaces.IInstaller
+    :param acme_clients: ACME clients to reuse, if any
+    :type acme_clients: client.ACMEClientCache
 
     :returns: client: Client object
     :rtype: client.Client
@@ -650,6 +653,8 @@ def _init_le_client(config, authenticator, installer):
         # if authenticator was given, then we will need account...
         acc, acme = _determine_account(config)
         logger.debug("Picked account: %r", acc)
+        if acme is None and acme_clients is not None:
+            acme = acme_clients.get(config, acc)
         # XXX
         #crypto_util.validate_key_csr(acc.key)
     else:
@@ -1019,6 +1024,26 @@ def update_symlinks(config, unused_plugins):
     """
     cert_manager.update_live_symlinks(config)
 
+def fill_key_pool(config, unused_plugins):
+    """Generate private keys into the key pool
+
+    Keys are generated until the pool holds config.key_pool_size keys of
+    the type and size selected by the configuration.
+
+    :param config: Configuration object
+    :type config: interfaces.IConfig
+
+    :param unused_plugins: List of plugins (deprecated)
+    :type unused_plugins: `list` of `str`
+
+    :returns: `None`
+    :rtype: None
+
+    """
+    key_type, key_size, elliptic_curve = key_pool.key_kind(config)
+    generated = key_pool.fill(config, key_type, key_size, elliptic_curve, config.key_pool_size)
+    display_util.notify("Generated {0} key(s) for the key pool.".format(generated))
+
 def rename(config, unused_plugins):
     """Rename a certificate
 
@@ -1205,7 +1230,7 @@ def _csr_get_and_save_cert(config, le_client):
     return cert_path, fullchain_path
 
 
-def renew_cert(config, plugins, lineage):
+def renew_cert(config, plugins, lineage, acme_clients=None):
     """Renew & save an existing cert. Do not install it.
 
     :param config: Configuration object
@@ -1217,6 +1242,10 @@ def renew_cert(config, plugins, lineage):
     :param lineage: Certificate lineage object
     :type lineage: storage.RenewableCert
 
+    :param acme_clients: ACME clients shared with the other lineages
+        renewed in this run, if any
+    :type acme_clients: client.ACMEClientCache
+
     :returns: `None`
     :rtype: None
 
@@ -1229,7 +1258,7 @@ def renew_cert(config, plugins, lineage):
     except errors.PluginSelectionError as e:
         logger.info("Could not choose appropriate plugin: %s", e)
         raise
-    le_client = _init_le_client(config, auth, installer)
+    le_client = _init_le_client(config, auth, installer, acme_clients=acme_clients)
 
     renewed_lineage = _get_and_save_cert(le_client, config, lineage=lineage)
 
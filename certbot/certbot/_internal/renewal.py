@@ -6,6 +6,7 @@ import itertools
 import logging
 import random
 import sys
+import threading
 import time
 import traceback
 
@@ -23,9 +24,12 @@ from certbot import errors
 from certbot import interfaces
 from certbot import util
 from certbot._internal import cli
-from certbot._internal import client  # pylint: disable=unused-import
+from certbot._internal import client
 from certbot._internal import constants
 from certbot._internal import hooks
+from certbot._internal import key_pool
+from certbot._internal import renewal_pipeline
+from certbot._internal import renewal_store
 from certbot._internal import storage
 from certbot._internal import updater
 from certbot._internal.plugins import disco as plugins_disco
@@ -49,7 +53,7 @@ CONFIG_ITEMS = set(itertools.chain(
     BOOL_CONFIG_ITEMS, INT_CONFIG_ITEMS, STR_CONFIG_ITEMS, ('pref_challs',)))
 
 
-def _reconstitute(config, full_path):
+def _reconstitute(config, full_path, store=None):
     """Try to instantiate a RenewableCert, updating config with relevant items.
 
     This is specifically for use in renewal and enforces several checks
@@ -61,13 +65,19 @@ def _reconstitute(config, full_path):
         current lineage
     :param str full_path: Absolute path to the configuration file that
         defines this lineage
+    :param store: store to read the configuration from instead of the
+        file, if any
+    :type store: `renewal_store.RenewalStore` or None
 
     :returns: the RenewableCert object or None if a fatal error occurred
     :rtype: `storage.RenewableCert` or NoneType
 
     """
+    configfile = None
+    if store is not None:
+        configfile = store.configfile(storage.lineagename_for_filename(full_path))
     try:
-        renewal_candidate = storage.RenewableCert(full_path, config)
+        renewal_candidate = storage.RenewableCert(full_path, config, configfile=configfile)
     except (errors.CertStorageError, IOError):
         logger.warning("", exc_info=True)
         logger.warning("Renewal configuration file %s is broken. Skipping.", full_path)
@@ -290,6 +300,22 @@ def should_renew(config, lineage):
     return False
 
 
+def _needs_new_key(config, lineage):
+    """Is lineage going to be renewed with a newly generated key?
+
+    Errors are left for the renewal of the lineage to report.
+
+    """
+    if lineage is None or config.reuse_key:
+        return False
+    try:
+        return config.renew_by_default or lineage.should_autorenew()
+    except Exception:  # pylint: disable=broad-except
+        logger.debug("Unable to tell whether %s is due for renewal", lineage.lineagename,
+                     exc_info=True)
+        return False
+
+
 def _avoid_invalidating_lineage(config, lineage, original_server):
     "Do not renew a valid cert with one from a staging server!"
     # Some lineages may have begun with --staging, but then had production certs
@@ -395,6 +421,75 @@ def _renew_describe_results(config, renew_successes, renew_failures,
     disp.notification("\n".join(out), wrap=False)
 
 
+class _RandomSleep(object):
+    """Random delay applied once, before the first renewal of a run."""
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        # Concurrent renewals wait for the delay to be over
+        with self._lock:
+            if self.enabled:
+                sleep_time = random.uniform(1, 60 * 8)
+                logger.info("Non-interactive renewal: random delay of %s seconds",
+                            sleep_time)
+                time.sleep(sleep_time)
+                # We will sleep only once this day, folks.
+                self.enabled = False
+
+
+def _renew_candidate(renewal_file, lineage_config,  # pylint: disable=too-many-arguments
+                     renewal_candidate, acme_clients, random_sleep):
+    """Renews a single lineage if it is due.
+
+    :returns: outcomes of the renewal, each of them a kind of outcome
+        (success, failure, skipped or parse_failure) and the value
+        reporting it
+    :rtype: `list` of `tuple`
+
+    """
+    disp = zope.component.getUtility(interfaces.IDisplay)
+    disp.notification("Processing " + renewal_file, pause=False)
+    lineagename = storage.lineagename_for_filename(renewal_file)
+
+    if renewal_candidate is None:
+        return [("parse_failure", renewal_file)]
+    outcomes = []
+    try:
+        renewal_candidate.ensure_deployed()
+        from certbot._internal import main
+        plugins = plugins_disco.PluginsRegistry.find_all()
+        if should_renew(lineage_config, renewal_candidate):
+            # Apply random sleep upon first renewal if needed
+            random_sleep()
+
+            # domains have been restored into lineage_config by reconstitute
+            # but they're unnecessary anyway because renew_cert here
+            # will just grab them from the certificate
+            # we already know it's time to renew based on should_renew
+            # and we have a lineage in renewal_candidate
+            main.renew_cert(lineage_config, plugins, renewal_candidate,
+                            acme_clients=acme_clients)
+            outcomes.append(("success", renewal_candidate.fullchain))
+        else:
+            expiry = crypto_util.notAfter(renewal_candidate.version(
+                "cert", renewal_candidate.latest_common_version()))
+            outcomes.append(("skipped", "%s expires on %s" % (
+                renewal_candidate.fullchain, expiry.strftime("%Y-%m-%d"))))
+        # Run updater interface methods
+        updater.run_generic_updaters(lineage_config, renewal_candidate,
+                                     plugins)
+    except Exception as e:  # pylint: disable=broad-except
+        # obtain_cert (presumably) encountered an unanticipated problem.
+        logger.warning("Attempting to renew cert (%s) from %s produced an "
+                       "unexpected error: %s. Skipping.", lineagename,
+                       renewal_file, e)
+        logger.debug("Traceback was:\n%s", traceback.format_exc())
+        outcomes.append(("failure", renewal_candidate.fullchain))
+    return outcomes
+
+
 def handle_renewal_request(config):
     """Examine each lineage; renew if due and report results"""
 
@@ -427,16 +522,20 @@ def handle_renewal_request(config):
     # shutting down a web service) aren't prolonged unnecessarily.
     apply_random_sleep = not sys.stdin.isatty() and config.random_sleep_on_renew
 
+    store = None
+    if config.renewal_store:
+        store = renewal_store.RenewalStore(config)
+        store.refresh()
+
+    candidates = []
     for renewal_file in conf_files:
-        disp = zope.component.getUtility(interfaces.IDisplay)
-        disp.notification("Processing " + renewal_file, pause=False)
         lineage_config = copy.deepcopy(config)
         lineagename = storage.lineagename_for_filename(renewal_file)
 
         # Note that this modifies config (to add back the configuration
         # elements from within the renewal configuration file).
         try:
-            renewal_candidate = _reconstitute(lineage_config, renewal_file)
+            renewal_candidate = _reconstitute(lineage_config, renewal_file, store)
         except Exception as e:  # pylint: disable=broad-except
             logger.warning("Renewal configuration file %s (cert: %s) "
                            "produced an unexpected error: %s. Skipping.",
@@ -444,49 +543,48 @@ def handle_renewal_request(config):
             logger.debug("Traceback was:\n%s", traceback.format_exc())
             parse_failures.append(renewal_file)
             continue
+        candidates.append((renewal_file, lineage_config, renewal_candidate))
+    if store is not None:
+        store.close()
+
+    # Deploy the pending versions of all lineages in a single pass over their
+    # directories. Lineages that fail are reported by ensure_deployed below.
+    storage.update_symlinks_bulk(
+        config, [renewal_candidate for _, _, renewal_candidate in candidates
+                 if renewal_candidate is not None], deploy_latest=True)
+
+    # Revoked certificates are due for renewal, so check the OCSP status of
+    # all lineages at once rather than one by one in should_renew.
+    if not config.renew_by_default:
+        storage.prefetch_ocsp_statuses(
+            config, [renewal_candidate for _, _, renewal_candidate in candidates
+             if renewal_candidate is not None and
+             renewal_candidate.autorenewal_is_enabled()])
+
+    # Generate the new keys of the lineages due for renewal in the
+    # background while the first ones are renewed
+    key_prefetcher = key_pool.Prefetcher(config)
+    if not config.dry_run:
+        key_prefetcher.prefetch(
+            key_pool.key_kind(lineage_config)
+            for _, lineage_config, renewal_candidate in candidates
+            if _needs_new_key(lineage_config, renewal_candidate))
+
+    acme_clients = client.ACMEClientCache()
+    random_sleep = _RandomSleep(apply_random_sleep)
+
+    def _process(renewal_file, lineage_config, renewal_candidate):
+        return _renew_candidate(renewal_file, lineage_config, renewal_candidate,
+                                acme_clients, random_sleep)
 
-        try:
-            if renewal_candidate is None:
-                parse_failures.append(renewal_file)
-            else:
-                # XXX: ensure that each call here replaces the previous one
-                zope.component.provideUtility(lineage_config)
-                renewal_candidate.ensure_deployed()
-                from certbot._internal import main
-                plugins = plugins_disco.PluginsRegistry.find_all()
-                if should_renew(lineage_config, renewal_candidate):
-                    # Apply random sleep upon first renewal if needed
-                    if apply_random_sleep:
-                        sleep_time = random.uniform(1, 60 * 8)
-                        logger.info("Non-interactive renewal: random delay of %s seconds",
-                                    sleep_time)
-                        time.sleep(sleep_time)
-                        # We will sleep only once this day, folks.
-                        apply_random_sleep = False
-
-                    # domains have been restored into lineage_config by reconstitute
-                    # but they're unnecessary anyway because renew_cert here
-                    # will just grab them from the certificate
-                    # we already know it's time to renew based on should_renew
-                    # and we have a lineage in renewal_candidate
-                    main.renew_cert(lineage_config, plugins, renewal_candidate)
-                    renew_successes.append(renewal_candidate.fullchain)
-                else:
-                    expiry = crypto_util.notAfter(renewal_candidate.version(
-                        "cert", renewal_candidate.latest_common_version()))
-                    renew_skipped.append("%s expires on %s" % (renewal_candidate.fullchain,
-                                         expiry.strftime("%Y-%m-%d")))
-                # Run updater interface methods
-                updater.run_generic_updaters(lineage_config, renewal_candidate,
-                                             plugins)
-
-        except Exception as e:  # pylint: disable=broad-except
-            # obtain_cert (presumably) encountered an unanticipated problem.
-            logger.warning("Attempting to renew cert (%s) from %s produced an "
-                           "unexpected error: %s. Skipping.", lineagename,
-                               renewal_file, e)
-            logger.debug("Traceback was:\n%s", traceback.format_exc())
-            renew_failures.append(renewal_candidate.fullchain)
+    try:
+        outcomes = renewal_pipeline.run(config, candidates, _process)
+    finally:
+        key_prefetcher.close()
+    reports = {"success": renew_successes, "failure": renew_failures,
+               "skipped": renew_skipped, "parse_failure": parse_failures}
+    for outcome, value in itertools.chain.from_iterable(outcomes):
+        reports[outcome].append(value)
 
     # Describe all the results
     _renew_describe_results(config, renew_successes, renew_failures,
@@ -0,0 +1,142 @@
+"""Renewal of several lineages at once.
+
+Most of the time spent renewing a certificate is spent waiting, for the
+ACME server to validate challenges or for DNS records to propagate.
+With ``--max-concurrent-renewals N``, up to N lineages go through their
+renewal at the same time, each in its own thread, so that one lineage
+can be finalized while the challenges of another are being validated.
+
+Plugins that bind ports or modify the configuration of a web server
+can't serve several lineages at once, so lineages using one of them as
+their authenticator or installer wait for each other.
+
+"""
+import contextlib
+import logging
+import threading
+
+from six.moves import queue  # type: ignore
+import zope.component
+import zope.interface
+
+from acme.magic_typing import Any
+from acme.magic_typing import Callable
+from acme.magic_typing import Dict
+from acme.magic_typing import List
+from acme.magic_typing import Tuple
+from certbot import interfaces
+
+logger = logging.getLogger(__name__)
+
+EXCLUSIVE_PLUGINS = frozenset(["apache", "manual", "nginx", "standalone"])
+"""Plugins that are only used for one lineage at a time."""
+
+
+@zope.interface.implementer(interfaces.IConfig)
+class ThreadConfig(object):
+    """IConfig utility resolving to the configuration of the current thread.
+
+    Code reading the configuration through ``zope.component`` gets the
+    configuration of the lineage renewed by its thread, or the default
+    configuration outside of the renewal threads.
+
+    """
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def use(self, config):
+        """Makes config the configuration of the current thread."""
+        self._local.config = config
+
+    def __getattr__(self, name):
+        return getattr(getattr(self._local, "config", self._default), name)
+
+
+class PluginLocks(object):
+    """Locks keeping exclusive plugins to one lineage at a time."""
+    def __init__(self):
+        self._locks = {}  # type: Dict[str, Any]
+        self._guard = threading.Lock()
+
+    @contextlib.contextmanager
+    def hold(self, config):
+        """Holds the locks of the exclusive plugins used by config."""
+        names = sorted(set(name for name in (config.authenticator, config.installer)
+                           if name in EXCLUSIVE_PLUGINS))
+        with self._guard:
+            locks = [self._locks.setdefault(name, threading.Lock()) for name in names]
+        # Locks are always acquired in the same order to avoid deadlocks
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+def run(config, candidates, process):
+    # type: (Any, List[Tuple[str, Any, Any]], Callable[..., Any]) -> List[Any]
+    """Calls process for each renewal candidate.
+
+    The configuration of each candidate is made the IConfig utility
+    while it is processed. Up to ``config.max_concurrent_renewals``
+    candidates are processed at the same time.
+
+    :param config: Configuration object
+    :type config: interfaces.IConfig
+    :param list candidates: renewal file, configuration and
+        `.RenewableCert` (or None) of each lineage
+    :param callable process: function called with the elements of each
+        candidate
+
+    :returns: results of process, in the order of candidates
+    :rtype: list
+
+    """
+    max_concurrent = config.max_concurrent_renewals or 1
+    if max_concurrent <= 1 or len(candidates) <= 1:
+        results = []
+        for renewal_file, lineage_config, renewal_candidate in candidates:
+            # XXX: ensure that each call here replaces the previous one
+            zope.component.provideUtility(lineage_config)
+            results.append(process(renewal_file, lineage_config, renewal_candidate))
+        return results
+
+    thread_config = ThreadConfig(config)
+    plugin_locks = PluginLocks()
+    results = [None] * len(candidates)  # type: List[Any]
+    failures = []  # type: List[BaseException]
+    work = queue.Queue()  # type: queue.Queue
+    for index, candidate in enumerate(candidates):
+        work.put((index, candidate))
+
+    def _worker():
+        while True:
+            try:
+                index, (renewal_file, lineage_config, renewal_candidate) = work.get_nowait()
+            except queue.Empty:
+                return
+            thread_config.use(lineage_config)
+            try:
+                with plugin_locks.hold(lineage_config):
+                    results[index] = process(renewal_file, lineage_config, renewal_candidate)
+            except BaseException as error:  # pylint: disable=broad-except
+                failures.append(error)
+                return
+
+    logger.debug("Renewing up to %d certificates at once", max_concurrent)
+    zope.component.provideUtility(thread_config, interfaces.IConfig)
+    try:
+        threads = [threading.Thread(target=_worker)
+                   for _ in range(min(max_concurrent, len(candidates)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        zope.component.provideUtility(config)
+    if failures:
+        raise failures[0]
+    return results
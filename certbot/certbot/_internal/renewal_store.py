@@ -0,0 +1,305 @@
+"""SQLite database holding the renewal configuration of every lineage.
+
+The renewal configuration files in `IConfig.renewal_configs_dir` remain
+the reference: the store imports the files that changed since they were
+last stored whenever it is refreshed, and exports the lineages it
+updates back to their files. Reading the configuration of every lineage
+from the store only requires checking the files' modification time and
+size, and the store can find or update the lineages with given renewal
+parameters in a single transaction.
+
+Like the rest of the config directory, the store is protected from
+concurrent Certbot runs by the lock taken on that directory, and each
+of its transactions also holds SQLite's write lock.
+
+"""
+import contextlib
+import json
+import logging
+import sqlite3
+
+import configobj
+
+from acme.magic_typing import Any
+from acme.magic_typing import Dict
+from acme.magic_typing import Iterable
+from acme.magic_typing import List
+from acme.magic_typing import Optional
+from certbot import errors
+from certbot._internal import constants
+from certbot._internal import storage
+from certbot.compat import filesystem
+from certbot.compat import os
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS lineages ("
+    " name TEXT PRIMARY KEY,"
+    " renewal_file TEXT NOT NULL,"
+    " conf_mtime REAL NOT NULL,"
+    " conf_size INTEGER NOT NULL,"
+    " config TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS params ("
+    " name TEXT NOT NULL REFERENCES lineages (name) ON DELETE CASCADE,"
+    " section TEXT NOT NULL,"
+    " key TEXT NOT NULL,"
+    " value TEXT NOT NULL,"
+    " PRIMARY KEY (name, section, key))",
+    "CREATE INDEX IF NOT EXISTS params_by_value ON params (section, key, value)",
+)
+
+
+class RenewalStore(object):
+    """Renewal configuration of every lineage, stored in a SQLite database.
+
+    :ivar str path: path of the database
+
+    """
+    def __init__(self, cli_config):
+        """Opens the store of the lineages in cli_config.config_dir.
+
+        :param .NamespaceConfig cli_config: parsed command line arguments
+
+        :raises .errors.Error: if the database can't be opened
+
+        """
+        self.cli_config = cli_config
+        self.path = os.path.join(cli_config.config_dir, constants.RENEWAL_STORE_FILENAME)
+        try:
+            # Transactions are started explicitly, see _transaction
+            self._connection = sqlite3.connect(self.path, isolation_level=None)
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            with self._transaction():
+                for statement in _SCHEMA:
+                    self._connection.execute(statement)
+        except sqlite3.Error as error:
+            raise errors.Error(
+                "Unable to open the renewal store {0}: {1}".format(self.path, error))
+
+    def close(self):
+        # type: () -> None
+        """Closes the database."""
+        self._connection.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Runs the statements of the with block in a single transaction."""
+        self._connection.execute("BEGIN IMMEDIATE")
+        committed = False
+        try:
+            yield
+            self._connection.execute("COMMIT")
+            committed = True
+        finally:
+            if not committed:
+                self._connection.execute("ROLLBACK")
+
+    def refresh(self):
+        # type: () -> List[str]
+        """Imports the renewal configuration files that changed.
+
+        Files that are new or were modified since they were last stored
+        are imported, and lineages whose file was removed are forgotten,
+        all in a single transaction.
+
+        :returns: names of the imported lineages
+        :rtype: `list` of `str`
+
+        """
+        stored = dict(
+            (name, (renewal_file, mtime, size)) for name, renewal_file, mtime, size in
+            self._connection.execute(
+                "SELECT name, renewal_file, conf_mtime, conf_size FROM lineages"))
+        changed = []
+        lineagenames = set()
+        for renewal_file in storage.renewal_conf_files(self.cli_config):
+            lineagename = storage.lineagename_for_filename(renewal_file)
+            lineagenames.add(lineagename)
+            try:
+                current = (renewal_file, os.path.getmtime(renewal_file),
+                           os.path.getsize(renewal_file))
+            except OSError:
+                continue
+            if stored.get(lineagename) != current:
+                changed.append(renewal_file)
+        removed = set(stored) - lineagenames
+        if changed or removed:
+            with self._transaction():
+                self._connection.executemany(
+                    "DELETE FROM lineages WHERE name = ?", [(name,) for name in removed])
+                imported = self._import(changed)
+        else:
+            imported = []
+        return imported
+
+    def import_conf_files(self, renewal_files=None):
+        # type: (Optional[Iterable[str]]) -> List[str]
+        """Imports renewal configuration files, in a single transaction.
+
+        :param renewal_files: paths of the files to import, all the
+            renewal configuration files if None
+
+        :returns: names of the imported lineages
+        :rtype: `list` of `str`
+
+        """
+        if renewal_files is None:
+            renewal_files = storage.renewal_conf_files(self.cli_config)
+        with self._transaction():
+            return self._import(renewal_files)
+
+    def _import(self, renewal_files):
+        # type: (Iterable[str]) -> List[str]
+        imported = []
+        for renewal_file in renewal_files:
+            lineagename = storage.lineagename_for_filename(renewal_file)
+            try:
+                mtime = os.path.getmtime(renewal_file)
+                size = os.path.getsize(renewal_file)
+                config = configobj.ConfigObj(renewal_file)
+            except (OSError, configobj.ConfigObjError) as error:
+                logger.debug("Unable to import %s into the renewal store: %s",
+                             renewal_file, error)
+                self._connection.execute("DELETE FROM lineages WHERE name = ?", (lineagename,))
+                continue
+            self._store(lineagename, renewal_file, mtime, size, config.dict())
+            imported.append(lineagename)
+        return imported
+
+    def _store(self, lineagename, renewal_file,  # pylint: disable=too-many-arguments
+               mtime, size, values):
+        # type: (str, str, float, int, Dict[str, Any]) -> None
+        self._connection.execute(
+            "INSERT OR REPLACE INTO lineages VALUES (?, ?, ?, ?, ?)",
+            (lineagename, renewal_file, mtime, size, json.dumps(values, sort_keys=True)))
+        self._connection.execute("DELETE FROM params WHERE name = ?", (lineagename,))
+        rows = []
+        for key, value in values.items():
+            if isinstance(value, dict):
+                rows.extend((lineagename, key, subkey, json.dumps(subvalue, sort_keys=True))
+                            for subkey, subvalue in value.items())
+            else:
+                rows.append((lineagename, "", key, json.dumps(value, sort_keys=True)))
+        self._connection.executemany("INSERT INTO params VALUES (?, ?, ?, ?)", rows)
+
+    def export_conf_files(self, lineagenames=None):
+        # type: (Optional[Iterable[str]]) -> List[str]
+        """Writes stored lineages back to their renewal configuration files.
+
+        :param lineagenames: names of the lineages to export, all the
+            stored lineages if None
+
+        :returns: paths of the written files
+        :rtype: `list` of `str`
+
+        """
+        if lineagenames is None:
+            lineagenames = [row[0] for row in self._connection.execute(
+                "SELECT name FROM lineages")]
+        written = []
+        with self._transaction():
+            for lineagename in lineagenames:
+                row = self._connection.execute(
+                    "SELECT renewal_file, config FROM lineages WHERE name = ?",
+                    (lineagename,)).fetchone()
+                if row is None:
+                    continue
+                renewal_file, values = row[0], json.loads(row[1])
+                _write_conf_file(renewal_file, values)
+                self._connection.execute(
+                    "UPDATE lineages SET conf_mtime = ?, conf_size = ? WHERE name = ?",
+                    (os.path.getmtime(renewal_file), os.path.getsize(renewal_file),
+                     lineagename))
+                written.append(renewal_file)
+        return written
+
+    def configfile(self, lineagename):
+        # type: (str) -> Optional[configobj.ConfigObj]
+        """Returns the stored renewal configuration of a lineage.
+
+        :param str lineagename: name of the lineage
+
+        :returns: the configuration, whose filename is the lineage's
+            renewal configuration file, or None if it isn't stored
+        :rtype: configobj.ConfigObj or None
+
+        """
+        row = self._connection.execute(
+            "SELECT renewal_file, config FROM lineages WHERE name = ?",
+            (lineagename,)).fetchone()
+        if row is None:
+            return None
+        config = configobj.ConfigObj(json.loads(row[1]))
+        config.filename = row[0]
+        return config
+
+    def find(self, key, value, section="renewalparams"):
+        # type: (str, Any, str) -> List[str]
+        """Finds the lineages whose configuration has key set to value.
+
+        :param str key: name of the option
+        :param value: value of the option, as stored by configobj
+        :param str section: section of the option, the empty string for
+            the options at the top of the configuration files
+
+        :returns: names of the matching lineages
+        :rtype: `list` of `str`
+
+        """
+        return [row[0] for row in self._connection.execute(
+            "SELECT name FROM params WHERE section = ? AND key = ? AND value = ? "
+            "ORDER BY name", (section, key, json.dumps(value, sort_keys=True)))]
+
+    def update(self, lineagenames, values, section="renewalparams"):
+        # type: (Iterable[str], Dict[str, Any], str) -> List[str]
+        """Sets options of several lineages in a single transaction.
+
+        The renewal configuration files of the updated lineages are then
+        rewritten.
+
+        :param lineagenames: names of the lineages to update
+        :param dict values: options to set, None removing an option
+        :param str section: section of the options, the empty string for
+            the options at the top of the configuration files
+
+        :returns: names of the updated lineages
+        :rtype: `list` of `str`
+
+        """
+        updated = []
+        with self._transaction():
+            for lineagename in lineagenames:
+                row = self._connection.execute(
+                    "SELECT renewal_file, conf_mtime, conf_size, config FROM lineages "
+                    "WHERE name = ?", (lineagename,)).fetchone()
+                if row is None:
+                    continue
+                config = json.loads(row[3])
+                options = config.setdefault(section, {}) if section else config
+                for key, value in values.items():
+                    if value is None:
+                        options.pop(key, None)
+                    else:
+                        options[key] = value
+                self._store(lineagename, row[0], row[1], row[2], config)
+                updated.append(lineagename)
+        self.export_conf_files(updated)
+        return updated
+
+
+def _write_conf_file(renewal_file, values):
+    # type: (str, Dict[str, Any]) -> None
+    """Atomically writes values to renewal_file, keeping its comments."""
+    config = configobj.ConfigObj(values)
+    if os.path.exists(renewal_file):
+        previous = configobj.ConfigObj(renewal_file)
+        config.initial_comment = previous.initial_comment
+        config.comments.update(
+            (key, comment) for key, comment in previous.comments.items() if key in config)
+    temp_file = renewal_file + ".new"
+    with open(temp_file, "wb") as f:
+        config.write(outfile=f)
+    if os.path.exists(renewal_file):
+        filesystem.copy_ownership_and_mode(renewal_file, temp_file)
+    filesystem.replace(temp_file, renewal_file)
@@ -14,6 +14,10 @@ from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 from cryptography.hazmat.primitives.serialization import load_pem_private_key
 
+from acme.magic_typing import Dict
+from acme.magic_typing import List
+from acme.magic_typing import Set
+from acme.magic_typing import Tuple
 import certbot
 from certbot import crypto_util
 from certbot import errors
@@ -23,6 +27,7 @@ from certbot import util
 from certbot._internal import cli
 from certbot._internal import constants
 from certbot._internal import error_handler
+from certbot._internal import lineage_index
 from certbot._internal.plugins import disco as plugins_disco
 from certbot.compat import filesystem
 from certbot.compat import os
@@ -172,6 +177,7 @@ def rename_renewal_config(prev_name, new_name, cli_config):
     except OSError:
         raise errors.ConfigurationError("Please specify a valid filename "
             "for the new certificate name.")
+    lineage_index.remove(cli_config, prev_name)
 
 
 def update_configuration(lineagename, archive_dir, target, cli_config):
@@ -339,6 +345,7 @@ def delete_files(config, certname):
         # if this was going to fail, it already would have.
         os.remove(renewal_filename)
         logger.debug("Removed %s", renewal_filename)
+        lineage_index.remove(config, certname)
 
     # cert files and (hopefully) live directory
     # it's not guaranteed that the files are in our default storage
@@ -382,6 +389,142 @@ def delete_files(config, certname):
         logger.debug("Unable to remove %s", archive_path)
 
 
+def update_symlinks_bulk(cli_config, lineages, deploy_latest=False):
+    """Update the symlinks of several lineages, scanning each directory once.
+
+    The symlinks of each lineage are made to point to its archive
+    directory, like `RenewableCert` does when asked to update them, and
+    with deploy_latest, to the latest version found there, like
+    `RenewableCert.ensure_deployed` does. Only the symlinks that need to
+    change are replaced, each by atomically renaming a new symlink over it.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+    :param list lineages: `RenewableCert` objects
+    :param bool deploy_latest: whether to deploy the latest version of
+        lineages with a pending deployment
+
+    :returns: the lineages that couldn't be updated, along with the
+        error raised for each
+    :rtype: `list` of `tuple`
+
+    """
+    scans = {}  # type: Dict[str, Tuple[List[str], Set[str]]]
+
+    def scan(directory):
+        """Lists directory once"""
+        if directory not in scans:
+            scans[directory] = _scan_directory(directory)
+        return scans[directory]
+
+    index = lineage_index.LineageIndex(cli_config)
+    failures = []
+    for lineage in lineages:
+        try:
+            if _update_lineage_symlinks(lineage, scan, deploy_latest):
+                index.update(lineage)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.debug("Unable to update the symlinks of %s: %s", lineage.lineagename, error)
+            failures.append((lineage, error))
+    index.save()
+    return failures
+
+
+def _update_lineage_symlinks(lineage, scan, deploy_latest):
+    """Updates the symlinks of lineage for update_symlinks_bulk.
+
+    :returns: whether any symlink was replaced
+    :rtype: bool
+
+    """
+    # pylint: disable=protected-access
+    archive_dir = lineage.archive_dir
+    archive_files = scan(archive_dir)[0]
+    lineage._listings[archive_dir] = archive_files
+
+    version = None
+    if deploy_latest and lineage.has_pending_deployment():
+        logger.warning("Found a new cert /archive/ that was not linked to in /live/; "
+                       "fixing...")
+        version = lineage.latest_common_version()
+
+    replaced = False
+    for kind in ALL_FOUR:
+        link = getattr(lineage, kind)
+        if os.path.basename(link) not in scan(os.path.dirname(link))[1]:
+            raise errors.CertStorageError("expected {0} to be a symlink".format(link))
+        previous_target = os.readlink(link)
+        if version is None:
+            filename = os.path.basename(previous_target)
+        else:
+            filename = "{0}{1}.pem".format(kind, version)
+        if filename not in archive_files:
+            raise errors.CertStorageError("target {0} of symlink {1} does not exist".format(
+                os.path.join(archive_dir, filename), link))
+        target = os.path.join(lineage.relative_archive_dir(link), filename)
+        if target != previous_target:
+            _replace_symlink(target, link)
+            replaced = True
+    if replaced:
+        lineage._clear_caches()
+    return replaced
+
+
+def _scan_directory(directory):
+    """Lists directory, noting which of its entries are symlinks.
+
+    :returns: the names of all entries and the set of names of symlinks
+    :rtype: tuple
+
+    """
+    scandir = getattr(os, "scandir", None)
+    if scandir is None:  # Python 2
+        names = os.listdir(directory)
+        return names, set(name for name in names
+                          if os.path.islink(os.path.join(directory, name)))
+    entries = list(scandir(directory))
+    return [entry.name for entry in entries], set(
+        entry.name for entry in entries if entry.is_symlink())
+
+
+def _replace_symlink(target, link):
+    """Atomically replaces link by a symlink to target."""
+    temp_link = link + ".new"
+    if os.path.lexists(temp_link):
+        os.unlink(temp_link)
+    os.symlink(target, temp_link)
+    filesystem.replace(temp_link, link)
+
+
+def prefetch_ocsp_statuses(cli_config, lineages):
+    """Determine the OCSP status of several lineages concurrently.
+
+    The status of the latest common version of each lineage is checked,
+    and later returned by :meth:`RenewableCert.ocsp_revoked` for that
+    version without querying the OCSP responder again.
+
+    :param .NamespaceConfig cli_config: parsed command line arguments
+    :param list lineages: `RenewableCert` objects
+
+    """
+    checked = []
+    paths = []
+    for lineage in lineages:
+        try:
+            version = lineage.latest_common_version()
+            paths.append((lineage.version("cert", version),
+                          lineage.version("chain", version)))
+        except Exception as e:  # pylint: disable=broad-except
+            # ocsp_revoked will check this lineage on its own
+            logger.debug("Not prefetching the OCSP status of %s: %s",
+                         lineage.lineagename, e)
+            continue
+        checked.append((lineage, version))
+    checker = ocsp.RevocationChecker(cache_dir=cli_config.ocsp_cache_dir)
+    statuses = checker.ocsp_revoked_by_paths_batch(paths)
+    for (lineage, version), revoked in zip(checked, statuses):
+        lineage._ocsp_prefetched[version] = revoked  # pylint: disable=protected-access
+
+
 class RenewableCert(interfaces.RenewableCert):
     """Renewable certificate.
 
@@ -417,12 +560,25 @@ class RenewableCert(interfaces.RenewableCert):
         renewal configuration file and/or systemwide defaults.
 
     """
-    def __init__(self, config_filename, cli_config, update_symlinks=False):
+    def __init__(self, config_filename, cli_config,  # pylint: disable=too-many-arguments
+                 update_symlinks=False, check_symlinks=True, configfile=None):
         """Instantiate a RenewableCert object from an existing lineage.
 
+        The targets of the lineage's symlinks and the contents of its
+        archive directory are read once, when first needed, and are only
+        read again after this object changes them.
+
         :param str config_filename: the path to the renewal config file
             that defines this lineage.
         :param .NamespaceConfig: parsed command line arguments
+        :param bool update_symlinks: whether to update the symlinks to
+            point to the configured archive directory
+        :param bool check_symlinks: whether to check that the symlinks
+            and their targets exist; read-only commands that handle
+            missing files themselves can skip this check
+        :param configobj.ConfigObj configfile: the contents of the renewal
+            config file if they were already loaded, e.g. from the
+            `.renewal_store.RenewalStore`
 
         :raises .CertStorageError: if the configuration file's name didn't end
             in ".conf", or the file is missing or broken.
@@ -435,11 +591,14 @@ class RenewableCert(interfaces.RenewableCert):
         # may have been chosen based on default values from the
         # systemwide renewal configuration; self.configfile should be
         # used to make and save changes.
-        try:
-            self.configfile = configobj.ConfigObj(config_filename)
-        except configobj.ConfigObjError:
-            raise errors.CertStorageError(
-                "error parsing {0}".format(config_filename))
+        if configfile is not None:
+            self.configfile = configfile
+        else:
+            try:
+                self.configfile = configobj.ConfigObj(config_filename)
+            except configobj.ConfigObjError:
+                raise errors.CertStorageError(
+                    "error parsing {0}".format(config_filename))
         # TODO: Do we actually use anything from defaults and do we want to
         #       read further defaults from the systemwide renewal configuration
         #       file at this stage?
@@ -463,11 +622,17 @@ class RenewableCert(interfaces.RenewableCert):
         self.chain = self.configuration["chain"]
         self.fullchain = self.configuration["fullchain"]
         self.live_dir = os.path.dirname(self.cert)
+        # OCSP statuses by version, determined by prefetch_ocsp_statuses
+        self._ocsp_prefetched = {}  # type: Dict[int, bool]
+        # Absolute link targets by kind, and file names by archive directory
+        self._link_targets = {}  # type: Dict[str, str]
+        self._listings = {}  # type: Dict[str, List[str]]
 
         self._fix_symlinks()
         if update_symlinks:
             self._update_symlinks()
-        self._check_symlinks()
+        if check_symlinks:
+            self._check_symlinks()
 
     @property
     def key_path(self):
@@ -535,7 +700,7 @@ class RenewableCert(interfaces.RenewableCert):
             if not os.path.islink(link):
                 raise errors.CertStorageError(
                     "expected {0} to be a symlink".format(link))
-            target = get_link_target(link)
+            target = self._link_target(kind)
             if not os.path.exists(target):
                 raise errors.CertStorageError("target {0} of symlink {1} does "
                                               "not exist".format(target, link))
@@ -550,16 +715,41 @@ class RenewableCert(interfaces.RenewableCert):
 
             os.unlink(link)
             os.symlink(new_link, link)
+        self._clear_caches()
+
+    def _clear_caches(self):
+        """Forgets the link targets and archive listings read so far."""
+        self._link_targets.clear()
+        self._listings.clear()
+
+    def _link_target(self, kind):
+        """Returns the absolute target of the symlink of kind, read once."""
+        target = self._link_targets.get(kind)
+        if target is None:
+            target = get_link_target(getattr(self, kind))
+            self._link_targets[kind] = target
+        return target
+
+    def _list_archive(self, directory):
+        """Returns the names of the files in directory, listed once."""
+        listing = self._listings.get(directory)
+        if listing is None:
+            listing = os.listdir(directory)
+            self._listings[directory] = listing
+        return listing
 
     def _consistent(self):
         """Are the files associated with this lineage self-consistent?
 
+        The lineage's files are read again from disk for this check.
+
         :returns: Whether the files stored in connection with this
             lineage appear to be correct and consistent with one
             another.
         :rtype: bool
 
         """
+        self._clear_caches()
         # Each element must be referenced with an absolute path
         for x in (self.cert, self.privkey, self.chain, self.fullchain):
             if not os.path.isabs(x):
@@ -574,7 +764,7 @@ class RenewableCert(interfaces.RenewableCert):
                 return False
         for kind in ALL_FOUR:
             link = getattr(self, kind)
-            target = get_link_target(link)
+            target = self._link_target(kind)
 
             # Each element's link must point within the cert lineage's
             # directory within the official archive directory
@@ -666,6 +856,7 @@ class RenewableCert(interfaces.RenewableCert):
                 if os.path.lexists(current_link):
                     os.unlink(current_link)
                 os.symlink(os.readlink(previous_link), current_link)
+            self._clear_caches()
 
         for _, link in previous_symlinks:
             if os.path.exists(link):
@@ -685,11 +876,11 @@ class RenewableCert(interfaces.RenewableCert):
         if kind not in ALL_FOUR:
             raise errors.CertStorageError("unknown kind of item")
         link = getattr(self, kind)
-        if not os.path.exists(link):
+        if kind not in self._link_targets and not os.path.exists(link):
             logger.debug("Expected symlink %s for %s does not exist.",
                          link, kind)
             return None
-        return get_link_target(link)
+        return self._link_target(kind)
 
     def current_version(self, kind):
         """Returns numerical version of the specified item.
@@ -754,7 +945,7 @@ class RenewableCert(interfaces.RenewableCert):
         if kind not in ALL_FOUR:
             raise errors.CertStorageError("unknown kind of item")
         where = os.path.dirname(self.current_target(kind))
-        files = os.listdir(where)
+        files = self._list_archive(where)
         pattern = re.compile(r"^{0}([0-9]+)\.pem$".format(kind))
         matches = [pattern.match(f) for f in files]
         return sorted([int(m.groups()[0]) for m in matches if m])
@@ -855,6 +1046,7 @@ class RenewableCert(interfaces.RenewableCert):
         #       for the other corresponding items
         os.unlink(link)
         os.symlink(os.path.join(target_directory, filename), link)
+        self._link_targets.pop(kind, None)
 
     def update_all_links_to(self, version):
         """Change all member objects to point to the specified version.
@@ -872,6 +1064,7 @@ class RenewableCert(interfaces.RenewableCert):
 
             for _, link in previous_links:
                 os.unlink(link)
+        lineage_index.update(self.cli_config, self)
 
     def names(self):
         """What are the subject names of this certificate?
@@ -884,8 +1077,7 @@ class RenewableCert(interfaces.RenewableCert):
         target = self.current_target("cert")
         if target is None:
             raise errors.CertStorageError("could not find cert file")
-        with open(target) as f:
-            return crypto_util.get_names_from_cert(f.read())
+        return list(crypto_util.parse_cert_file(target).names)
 
     def ocsp_revoked(self, version):
         """Is the specified cert version revoked according to OCSP?
@@ -900,14 +1092,16 @@ class RenewableCert(interfaces.RenewableCert):
         :rtype: bool
 
         """
+        if version in self._ocsp_prefetched:
+            return self._ocsp_prefetched[version]
         cert_path = self.version("cert", version)
         chain_path = self.version("chain", version)
         # While the RevocationChecker should return False if it failed to
         # determine the OCSP status, let's ensure we don't crash Certbot by
         # catching all exceptions here.
         try:
-            return ocsp.RevocationChecker().ocsp_revoked_by_paths(cert_path,
-                                                                  chain_path)
+            checker = ocsp.RevocationChecker(cache_dir=self.cli_config.ocsp_cache_dir)
+            return checker.ocsp_revoked_by_paths(cert_path, chain_path)
         except Exception as e:  # pylint: disable=broad-except
             logger.warning(
                 "An error occurred determining the OCSP status of %s.",
@@ -1057,7 +1251,9 @@ class RenewableCert(interfaces.RenewableCert):
 
         new_config = write_renewal_config(config_filename, config_filename, archive,
             target, values)
-        return cls(new_config.filename, cli_config)
+        lineage = cls(new_config.filename, cli_config)
+        lineage_index.update(cli_config, lineage)
+        return lineage
 
     @property
     def private_key_type(self):
@@ -1146,11 +1342,13 @@ class RenewableCert(interfaces.RenewableCert):
         with open(target["fullchain"], "wb") as f:
             logger.debug("Writing full chain to %s.", target["fullchain"])
             f.write(new_cert + new_chain)
+        self._listings.clear()
 
         symlinks = {kind: self.configuration[kind] for kind in ALL_FOUR}
         # Update renewal config file
         self.configfile = update_configuration(
             self.lineagename, self.archive_dir, symlinks, cli_config)
         self.configuration = config_with_defaults(self.configfile)
+        lineage_index.update(cli_config, self)
 
         return target_version
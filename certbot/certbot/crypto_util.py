@@ -4,6 +4,7 @@
     is capable of handling the signatures.
 
 """
+import collections
 import hashlib
 import logging
 import warnings
@@ -26,10 +27,13 @@ import six
 import zope.component
 
 from acme import crypto_util as acme_crypto_util
+from acme.magic_typing import Dict
 from acme.magic_typing import IO  # pylint: disable=unused-import
+from acme.magic_typing import Tuple
 from certbot import errors
 from certbot import interfaces
 from certbot import util
+from certbot.compat import filesystem
 from certbot.compat import os
 
 logger = logging.getLogger(__name__)
@@ -449,6 +453,53 @@ def dump_pyopenssl_chain(chain, filetype=crypto.FILETYPE_PEM):
     return acme_crypto_util.dump_pyopenssl_chain(chain, filetype)
 
 
+ParsedCert = collections.namedtuple("ParsedCert", "not_before not_after names sans serial")
+"""Fields of a certificate returned by :func:`parse_cert_file`.
+
+``names`` and ``sans`` are tuples of domain names, ``names`` including
+the CN if it is set, and ``serial`` is an `int`.
+
+"""
+
+# Parsed certificates, by the real path of their file, along with the
+# modification time and size of the file when it was parsed.
+_PARSED_CERTS = {}  # type: Dict[str, Tuple[float, int, ParsedCert]]
+
+
+def parse_cert_file(cert_path):
+    """Parse the cert at cert_path, unless it is unchanged since it last was.
+
+    Parsed certs are cached by the real path of their file, its
+    modification time and its size, so reading several fields of the same
+    cert only loads it once.
+
+    :param str cert_path: path to a cert in PEM format
+
+    :returns: the fields of the cert at cert_path
+    :rtype: ParsedCert
+
+    """
+    # pylint: disable=redefined-outer-name
+    path = filesystem.realpath(cert_path)
+    mtime = os.path.getmtime(path)
+    size = os.path.getsize(path)
+    cached = _PARSED_CERTS.get(path)
+    if cached is not None and cached[:2] == (mtime, size):
+        return cached[2]
+
+    with open(path, "rb") as f:  # type: IO[bytes]
+        x509 = crypto.load_certificate(crypto.FILETYPE_PEM, f.read())
+    parsed = ParsedCert(
+        not_before=_asn1_time_to_datetime(x509.get_notBefore()),
+        not_after=_asn1_time_to_datetime(x509.get_notAfter()),
+        names=tuple(_get_names_from_loaded_cert_or_req(x509)),
+        # pylint: disable=protected-access
+        sans=tuple(acme_crypto_util._pyopenssl_cert_or_req_san(x509)),
+        serial=x509.get_serial_number())
+    _PARSED_CERTS[path] = (mtime, size, parsed)
+    return parsed
+
+
 def notBefore(cert_path):
     """When does the cert at cert_path start being valid?
 
@@ -458,7 +509,7 @@ def notBefore(cert_path):
     :rtype: :class:`datetime.datetime`
 
     """
-    return _notAfterBefore(cert_path, crypto.X509.get_notBefore)
+    return parse_cert_file(cert_path).not_before
 
 
 def notAfter(cert_path):
@@ -470,25 +521,20 @@ def notAfter(cert_path):
     :rtype: :class:`datetime.datetime`
 
     """
-    return _notAfterBefore(cert_path, crypto.X509.get_notAfter)
+    return parse_cert_file(cert_path).not_after
 
 
-def _notAfterBefore(cert_path, method):
-    """Internal helper function for finding notbefore/notafter.
+def _asn1_time_to_datetime(timestamp):
+    """Internal helper function for converting notbefore/notafter.
 
-    :param str cert_path: path to a cert in PEM format
-    :param function method: one of ``crypto.X509.get_notBefore``
-        or ``crypto.X509.get_notAfter``
+    :param bytes timestamp: the ASN.1 GENERALIZEDTIME returned by
+        ``crypto.X509.get_notBefore`` or ``crypto.X509.get_notAfter``
 
-    :returns: the notBefore or notAfter value from the cert at cert_path
+    :returns: the corresponding time
     :rtype: :class:`datetime.datetime`
 
     """
-    # pylint: disable=redefined-outer-name
-    with open(cert_path, "rb") as f:  # type: IO[bytes]
-        x509 = crypto.load_certificate(crypto.FILETYPE_PEM, f.read())
     # pyopenssl always returns bytes
-    timestamp = method(x509)
     reformatted_timestamp = [timestamp[0:4], b"-", timestamp[4:6], b"-",
                              timestamp[6:8], b"T", timestamp[8:10], b":",
                              timestamp[10:12], b":", timestamp[12:]]
@@ -566,10 +612,7 @@ def get_serial_from_cert(cert_path):
     :returns: serial number of the certificate
     :rtype: int
     """
-    # pylint: disable=redefined-outer-name
-    with open(cert_path, "rb") as f:  # type: IO[bytes]
-        x509 = crypto.load_certificate(crypto.FILETYPE_PEM, f.read())
-    return x509.get_serial_number()
+    return parse_cert_file(cert_path).serial
 
 
 def find_chain_with_issuer(fullchains, issuer_cn, warn_on_no_match=False):
@@ -673,3 +673,41 @@ class RenewDeployer(object):
         :type lineage: RenewableCert
 
         """
+
+
+@six.add_metaclass(abc.ABCMeta)
+class TransactionalInstaller(object):
+    """Interface for installers able to group several saves into one
+
+    This class allows installers to defer writing configuration changes
+    while Certbot performs an operation spanning several domains, so that
+    the operation results in a single write of each modified file and a
+    single configuration checkpoint.
+
+    To make use of this interface, the installer should implement the interface
+    methods, and interfaces.TransactionalInstaller.register(InstallerClass)
+    should be called from the installer code.
+
+    An open transaction must be discarded by `IInstaller.recovery_routine`.
+    """
+
+    @abc.abstractmethod
+    def begin_transaction(self):
+        """Start deferring permanent saves
+
+        Until `commit_transaction` is called, calls to `IInstaller.save` that
+        are not temporary must only record their title instead of writing
+        the configuration and finalizing a checkpoint.
+
+        """
+
+    @abc.abstractmethod
+    def commit_transaction(self):
+        """Save all changes made since `begin_transaction`
+
+        All changes are saved as a single checkpoint whose title combines
+        the titles passed to `IInstaller.save` during the transaction.
+
+        :raises .PluginError: when the changes cannot be saved
+
+        """
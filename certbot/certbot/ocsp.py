@@ -1,10 +1,12 @@
 """Tools for checking certificate revocation."""
+import binascii
 from datetime import datetime
 from datetime import timedelta
 import logging
 import re
 from subprocess import PIPE
 from subprocess import Popen
+import threading
 
 from cryptography import x509
 from cryptography.exceptions import InvalidSignature
@@ -15,12 +17,20 @@ from cryptography.hazmat.primitives import hashes  # type: ignore
 from cryptography.hazmat.primitives import serialization
 import pytz
 import requests
+from requests.adapters import HTTPAdapter
+from six.moves import queue  # type: ignore
 
+from acme.magic_typing import Any
+from acme.magic_typing import Callable
+from acme.magic_typing import List
 from acme.magic_typing import Optional
+from acme.magic_typing import Sequence
 from acme.magic_typing import Tuple
 from certbot import crypto_util
 from certbot import errors
 from certbot import util
+from certbot.compat import filesystem
+from certbot.compat import os
 from certbot.compat.os import getenv
 from certbot.interfaces import RenewableCert  # pylint: disable=unused-import
 
@@ -35,35 +45,70 @@ except (ImportError, AttributeError):  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
+# Whether the openssl binary wants -header var=val, see RevocationChecker.host_args
+_openssl_header_with_equals = None  # type: Optional[bool]
+_OPENSSL_PROBE_LOCK = threading.Lock()
+
 
 class RevocationChecker(object):
     """This class figures out OCSP checking on this system, and performs it."""
 
-    def __init__(self, enforce_openssl_binary_usage=False):
+    def __init__(self, enforce_openssl_binary_usage=False, cache_dir=None,
+                 cache_refresh_fraction=0.5):
+        """Initialize the checker.
+
+        :param bool enforce_openssl_binary_usage: Use the openssl binary
+            even if the cryptography OCSP API is available
+        :param str cache_dir: Directory where verified OCSP responses are
+            kept and reused by later checks, None disables the cache
+        :param float cache_refresh_fraction: Fraction of the validity
+            period (between thisUpdate and nextUpdate) of a cached response
+            after which a fresh response is fetched
+
+        """
         self.broken = False
         self.use_openssl_binary = enforce_openssl_binary_usage or not ocsp
+        # HTTP session shared by the queries of a batch check
+        self._session = None  # type: Optional[requests.Session]
+        self._cache = None  # type: Optional[_ResponseCache]
+        if cache_dir is not None:
+            self._cache = _ResponseCache(cache_dir, cache_refresh_fraction)
 
-        if self.use_openssl_binary:
-            if not util.exe_exists("openssl"):
-                logger.info("openssl not installed, can't check revocation")
-                self.broken = True
-                return
-
-            # New versions of openssl want -header var=val, old ones want -header var val
-            test_host_format = Popen(["openssl", "ocsp", "-header", "var", "val"],
-                                     stdout=PIPE, stderr=PIPE, universal_newlines=True,
-                                     env=util.env_no_snap_for_external_calls())
-            _out, err = test_host_format.communicate()
-            if "Missing =" in err:
-                self.host_args = lambda host: ["Host=" + host]
-            else:
-                self.host_args = lambda host: ["Host", host]
+        if self.use_openssl_binary and not util.exe_exists("openssl"):
+            logger.info("openssl not installed, can't check revocation")
+            self.broken = True
+
+    def host_args(self, host):
+        # type: (str) -> List[str]
+        """Returns the openssl ocsp arguments setting the Host header.
+
+        New versions of openssl want -header var=val, old ones want
+        -header var val. The installed openssl is probed for this the first
+        time it is needed in this process.
+
+        :param str host: OCSP server host
+
+        :rtype: `list` of `str`
+
+        """
+        global _openssl_header_with_equals  # pylint: disable=global-statement
+        with _OPENSSL_PROBE_LOCK:
+            if _openssl_header_with_equals is None:
+                test_host_format = Popen(["openssl", "ocsp", "-header", "var", "val"],
+                                         stdout=PIPE, stderr=PIPE, universal_newlines=True,
+                                         env=util.env_no_snap_for_external_calls())
+                _out, err = test_host_format.communicate()
+                _openssl_header_with_equals = "Missing =" in err
+        if _openssl_header_with_equals:
+            return ["Host=" + host]
+        return ["Host", host]
 
     def ocsp_revoked(self, cert):
         # type: (RenewableCert) -> bool
         """Get revoked status for a particular cert version.
 
-        .. todo:: Make this a non-blocking call
+        Use :meth:`ocsp_revoked_batch` to check several certificates
+        concurrently.
 
         :param `.interfaces.RenewableCert` cert: Certificate object
         :returns: True if revoked; False if valid or the check failed or cert is expired.
@@ -100,7 +145,88 @@ class RevocationChecker(object):
 
         if self.use_openssl_binary:
             return self._check_ocsp_openssl_bin(cert_path, chain_path, host, url, timeout)
-        return _check_ocsp_cryptography(cert_path, chain_path, url, timeout)
+        return _check_ocsp_cryptography(cert_path, chain_path, url, timeout,
+                                        session=self._session, cache=self._cache)
+
+    def ocsp_revoked_batch(self, certs, max_workers=10):
+        # type: (Sequence[RenewableCert], int) -> List[bool]
+        """Get revoked status of several certificates concurrently.
+
+        :param list certs: `.interfaces.RenewableCert` objects
+        :param int max_workers: Maximum number of concurrent OCSP queries
+
+        :returns: For each certificate, True if revoked; False if valid or
+            the check failed or cert is expired.
+        :rtype: `list` of `bool`
+
+        """
+        return self._run_batch(self.ocsp_revoked, [(cert,) for cert in certs],
+                               [cert.cert_path for cert in certs], max_workers)
+
+    def ocsp_revoked_by_paths_batch(self, paths, timeout=10, max_workers=10):
+        # type: (Sequence[Tuple[str, str]], int, int) -> List[bool]
+        """Performs the OCSP revocation check of several certificates concurrently
+
+        :param list paths: (certificate filepath, certificate chain) tuples
+        :param int timeout: Timeout (in seconds) for each OCSP query
+        :param int max_workers: Maximum number of concurrent OCSP queries
+
+        :returns: For each certificate, True if revoked; False if valid or
+            the check failed or cert is expired.
+        :rtype: `list` of `bool`
+
+        """
+        return self._run_batch(self.ocsp_revoked_by_paths,
+                               [(cert_path, chain_path, timeout)
+                                for cert_path, chain_path in paths],
+                               [cert_path for cert_path, _ in paths], max_workers)
+
+    def _run_batch(self, check, args_list, cert_paths, max_workers):
+        # type: (Callable[..., bool], List[Tuple[Any, ...]], List[str], int) -> List[bool]
+        """Runs check for each element of args_list in a bounded thread pool.
+
+        The OCSP queries made meanwhile share one HTTP session, so
+        connections to the responders are reused between certificates.
+        An error checking a certificate is logged and reported as not revoked.
+
+        """
+        results = [False] * len(args_list)
+        if self.broken or not args_list:
+            return results
+
+        work = queue.Queue()  # type: queue.Queue
+        for index, args in enumerate(args_list):
+            work.put((index, args))
+
+        def _worker():
+            while True:
+                try:
+                    index, args = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[index] = check(*args)
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.warning("An error occurred determining the OCSP status of %s.",
+                                   cert_paths[index])
+                    logger.debug(str(e))
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self._session = session
+        try:
+            threads = [threading.Thread(target=_worker)
+                       for _ in range(min(max_workers, len(args_list)))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self._session = None
+            session.close()
+        return results
 
     def _check_ocsp_openssl_bin(self, cert_path, chain_path, host, url, timeout):
         # type: (str, str, str, str, int) -> bool
@@ -140,6 +266,69 @@ class RevocationChecker(object):
         return _translate_ocsp_query(cert_path, output, err)
 
 
+class _ResponseCache(object):
+    """On-disk cache of verified OCSP responses.
+
+    Responses are stored in DER form, one file per issuer and serial
+    number. A response is reused until refresh_fraction of the period
+    between its thisUpdate and nextUpdate has elapsed. Responses without
+    nextUpdate are never cached.
+
+    """
+
+    def __init__(self, directory, refresh_fraction):
+        # type: (str, float) -> None
+        if not 0 < refresh_fraction <= 1:
+            raise ValueError("refresh_fraction must be in (0, 1]")
+        self.directory = directory
+        self.refresh_fraction = refresh_fraction
+
+    def get(self, request):
+        """Returns the fresh cached response to request, or None."""
+        path = self._path(request)
+        try:
+            with open(path, 'rb') as file_handler:
+                response = ocsp.load_der_ocsp_response(file_handler.read())
+        except (IOError, OSError):
+            return None
+        except ValueError:
+            logger.debug("Ignoring unreadable cached OCSP response %s", path)
+            return None
+        if not self._fresh(response):
+            return None
+        return response
+
+    def put(self, request, response_der, response):
+        """Stores the verified response to request."""
+        if not self._fresh(response):
+            return
+        path = self._path(request)
+        try:
+            if not os.path.isdir(self.directory):
+                filesystem.makedirs(self.directory, 0o755)
+            # Write to a separate file first so that concurrent readers
+            # never see a partially written response
+            temp_path = "{0}.{1}.tmp".format(path, threading.current_thread().ident)
+            with open(temp_path, 'wb') as file_handler:
+                file_handler.write(response_der)
+            filesystem.replace(temp_path, path)
+        except (IOError, OSError) as error:
+            logger.debug("Unable to cache the OCSP response in %s: %s", path, error)
+
+    def _fresh(self, response):
+        if not response.next_update or not response.this_update:
+            return False
+        validity = (response.next_update - response.this_update).total_seconds()
+        refresh_at = response.this_update + timedelta(
+            seconds=validity * self.refresh_fraction)
+        return datetime.utcnow() < refresh_at
+
+    def _path(self, request):
+        return os.path.join(self.directory, "{0}-{1:x}.der".format(
+            binascii.hexlify(request.issuer_key_hash).decode('ascii'),
+            request.serial_number))
+
+
 def _determine_ocsp_server(cert_path):
     # type: (str) -> Tuple[Optional[str], Optional[str]]
     """Extract the OCSP server host from a certificate.
@@ -171,8 +360,9 @@ def _determine_ocsp_server(cert_path):
     return None, None
 
 
-def _check_ocsp_cryptography(cert_path, chain_path, url, timeout):
-    # type: (str, str, str, int) -> bool
+def _check_ocsp_cryptography(  # pylint: disable=too-many-arguments
+        cert_path, chain_path, url, timeout, session=None, cache=None):
+    # type: (str, str, str, int, Optional[requests.Session], Optional[_ResponseCache]) -> bool
     # Retrieve OCSP response
     with open(chain_path, 'rb') as file_handler:
         issuer = x509.load_pem_x509_certificate(file_handler.read(), default_backend())
@@ -181,25 +371,33 @@ def _check_ocsp_cryptography(cert_path, chain_path, url, timeout):
     builder = ocsp.OCSPRequestBuilder()
     builder = builder.add_certificate(cert, issuer, hashes.SHA1())
     request = builder.build()
-    request_binary = request.public_bytes(serialization.Encoding.DER)
-    try:
-        response = requests.post(url, data=request_binary,
-                                 headers={'Content-Type': 'application/ocsp-request'},
-                                 timeout=timeout)
-    except requests.exceptions.RequestException:
-        logger.info("OCSP check failed for %s (are we offline?)", cert_path, exc_info=True)
-        return False
-    if response.status_code != 200:
-        logger.info("OCSP check failed for %s (HTTP status: %d)", cert_path, response.status_code)
-        return False
+    response_der = None
+    response_ocsp = cache.get(request) if cache else None
+    if response_ocsp is not None:
+        logger.debug("Using cached OCSP response for %s", cert_path)
+    else:
+        request_binary = request.public_bytes(serialization.Encoding.DER)
+        try:
+            response = (session or requests).post(
+                url, data=request_binary,
+                headers={'Content-Type': 'application/ocsp-request'},
+                timeout=timeout)
+        except requests.exceptions.RequestException:
+            logger.info("OCSP check failed for %s (are we offline?)", cert_path, exc_info=True)
+            return False
+        if response.status_code != 200:
+            logger.info("OCSP check failed for %s (HTTP status: %d)",
+                        cert_path, response.status_code)
+            return False
 
-    response_ocsp = ocsp.load_der_ocsp_response(response.content)
+        response_der = response.content
+        response_ocsp = ocsp.load_der_ocsp_response(response_der)
 
-    # Check OCSP response validity
-    if response_ocsp.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
-        logger.error("Invalid OCSP response status for %s: %s",
-                     cert_path, response_ocsp.response_status)
-        return False
+        # Check OCSP response validity
+        if response_ocsp.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+            logger.error("Invalid OCSP response status for %s: %s",
+                         cert_path, response_ocsp.response_status)
+            return False
 
     # Check OCSP signature
     try:
@@ -213,6 +411,8 @@ def _check_ocsp_cryptography(cert_path, chain_path, url, timeout):
     except AssertionError as error:
         logger.error('Invalid OCSP response for %s: %s.', cert_path, str(error))
     else:
+        if cache and response_der is not None:
+            cache.put(request, response_der, response_ocsp)
         # Check OCSP certificate status
         logger.debug("OCSP certificate status for %s is: %s",
                      cert_path, response_ocsp.certificate_status)
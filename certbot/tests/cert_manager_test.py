@@ -1,6 +1,8 @@
 
 """Tests for certbot._internal.cert_manager."""
 # pylint: disable=protected-access
+import datetime
+import json
 import re
 import shutil
 import tempfile
@@ -11,6 +13,7 @@ try:
     import mock
 except ImportError: # pragma: no cover
     from unittest import mock
+import pytz
 
 from certbot import errors
 from certbot._internal import configuration
@@ -104,6 +107,15 @@ class UpdateLiveSymlinksTest(BaseCertManagerTest):
         finally:
             os.chdir(prev_dir)
 
+    def test_update_live_symlinks_failure(self):
+        from certbot._internal import cert_manager
+        for domain in self.domains:
+            for kind in ALL_FOUR:
+                # the targets are missing from the archive directories
+                os.symlink(os.path.join(self.config.config_dir, kind + "1.pem"),
+                           self.config_files[domain][kind])
+        self.assertRaises(errors.CertStorageError, cert_manager.update_live_symlinks, self.config)
+
 
 class DeleteTest(storage_test.BaseRenewableCertTest):
     """Tests for certbot._internal.cert_manager.delete
@@ -246,6 +258,32 @@ class CertificatesTest(BaseCertManagerTest):
         self.assertTrue(mock_utility.called)
         shutil.rmtree(empty_tempdir)
 
+    @mock.patch('certbot.crypto_util.get_serial_from_cert')
+    @mock.patch('certbot._internal.cert_manager.ocsp.RevocationChecker.ocsp_revoked')
+    @mock.patch('certbot._internal.cert_manager.ocsp.RevocationChecker.ocsp_revoked_batch')
+    def test_report_human_readable_batch(self, mock_batch, mock_revoked, mock_serial):
+        mock_serial.return_value = 1234567890
+        from certbot._internal import cert_manager
+        import datetime
+        import pytz
+        expiry = pytz.UTC.fromutc(datetime.datetime.utcnow()) + datetime.timedelta(days=5)
+        certs = []
+        for name in ("expired", "revoked", "filtered", "valid"):
+            cert = mock.MagicMock(lineagename=name, target_expiry=expiry, is_test_cert=False)
+            cert.names.return_value = ["example.org"] if name != "filtered" else ["example.com"]
+            certs.append(cert)
+        certs[0].target_expiry -= datetime.timedelta(days=10)
+        mock_batch.return_value = [True, False]
+        mock_config = mock.MagicMock(certname=None, domains=["example.org"])
+
+        # pylint: disable=protected-access
+        out = cert_manager._report_human_readable(mock_config, certs)
+        mock_batch.assert_called_once_with([certs[1], certs[3]])
+        self.assertFalse(mock_revoked.called)
+        self.assertEqual(out.count("INVALID: EXPIRED"), 1)
+        self.assertEqual(out.count("INVALID: REVOKED"), 1)
+        self.assertFalse("filtered" in out)
+
     @mock.patch('certbot.crypto_util.get_serial_from_cert')
     @mock.patch('certbot._internal.cert_manager.ocsp.RevocationChecker.ocsp_revoked')
     def test_report_human_readable(self, mock_revoked, mock_serial):
@@ -479,6 +517,75 @@ class RenameLineageTest(BaseCertManagerTest):
         self.assertRaises(errors.ConfigurationError, self._call, self.config)
 
 
+class CertificatesListingTest(storage_test.BaseRenewableCertTest):
+    """Tests for the filters and JSON output of certbot._internal.cert_manager.certificates"""
+
+    def setUp(self):
+        super(CertificatesListingTest, self).setUp()
+        self.config_file['renewalparams'] = {}
+        self.config_file.write()
+        self._write_out_ex_kinds()
+        with open(self.test_rc.cert, 'wb') as f:
+            f.write(test_util.load_vector('cert-san_512.pem'))
+        with open(self.test_rc.privkey, 'wb') as f:
+            f.write(test_util.load_vector('rsa2048_key.pem'))
+
+    def _certificates(self):
+        from certbot._internal.cert_manager import certificates
+        with mock.patch('certbot.crypto_util.verify_renewable_cert'):
+            with mock.patch('certbot._internal.cert_manager.ocsp.RevocationChecker'):
+                with test_util.patch_get_utility() as mock_utility:
+                    certificates(self.config)
+        return mock_utility().notification
+
+    def test_json_output(self):
+        self.config.output_format = 'json'
+        mock_notification = self._certificates()
+        self.assertEqual(mock_notification.call_count, 1)
+        record = json.loads(mock_notification.call_args[0][0])
+        self.assertEqual(record['name'], 'example.org')
+        self.assertEqual(record['key_type'], 'RSA')
+        self.assertEqual(sorted(record['domains']), ['example.com', 'www.example.com'])
+        self.assertEqual(record['cert_path'], self.test_rc.cert)
+        self.assertFalse(record['valid'])
+        self.assertTrue('EXPIRED' in record['invalid_reasons'])
+
+    def test_json_output_parse_failures_paginated(self):
+        self.config.output_format = 'json'
+        for name in ('broken1', 'broken2'):
+            with open(os.path.join(self.config.renewal_configs_dir, name + '.conf'), 'w') as f:
+                f.write('not a renewal configuration')
+        with mock.patch('certbot._internal.cert_manager.constants.CERTIFICATES_PAGE_SIZE', 1):
+            mock_notification = self._certificates()
+        self.assertEqual(mock_notification.call_count, 3)
+        records = [json.loads(call[0][0]) for call in mock_notification.call_args_list]
+        self.assertEqual(sorted(record['name'] for record in records),
+                         ['broken1', 'broken2', 'example.org'])
+
+    def test_filter_key_type(self):
+        self.config.filter_key_type = 'ecdsa'
+        self.assertTrue('No certs found.' in self._certificates().call_args[0][0])
+        self.config.filter_key_type = 'rsa'
+        self.assertTrue('example.org' in self._certificates().call_args[0][0])
+
+    def test_filtered_lineages_are_not_loaded(self):
+        self._certificates()
+        self.config.filter_key_type = 'ecdsa'
+        with mock.patch('certbot._internal.cert_manager.storage.RenewableCert') as mock_rc:
+            self._certificates()
+        self.assertFalse(mock_rc.called)
+
+    def test_expires_within(self):
+        from certbot._internal.cert_manager import _matches_listing_filters
+        now = datetime.datetime(2020, 1, 1, tzinfo=pytz.UTC)
+        cert = mock.MagicMock(private_key_type='RSA',
+                              target_expiry=now + datetime.timedelta(days=20))
+        self.config.expires_within = 30
+        self.assertTrue(_matches_listing_filters(self.config, cert, now))
+        self.config.expires_within = 10
+        self.assertFalse(_matches_listing_filters(self.config, cert, now))
+
+
 class DuplicativeCertsTest(storage_test.BaseRenewableCertTest):
     """Test to avoid duplicate lineages."""
 
@@ -516,6 +623,37 @@ class DuplicativeCertsTest(storage_test.BaseRenewableCertTest):
             self.config, ['example.com', 'something.new'])
         self.assertEqual(result, (None, None))
 
+    @mock.patch('certbot.util.make_or_verify_dir')
+    def test_find_duplicative_names_uses_index(self, unused_makedir):
+        from certbot._internal.cert_manager import find_duplicative_certs
+        with open(self.test_rc.cert, 'wb') as f:
+            f.write(test_util.load_vector('cert-san_512.pem'))
+        with open(self.test_rc.privkey, 'wb') as f:
+            f.write(test_util.load_vector('rsa2048_key.pem'))
+        self.config_file['renewalparams'] = {}
+        self.config_file.write()
+        domains = ['example.com', 'www.example.com']
+        find_duplicative_certs(self.config, domains)
+
+        with mock.patch('certbot._internal.cert_manager.storage.RenewableCert') as mock_rc:
+            mock_rc.return_value = self.test_rc
+            self.assertEqual(find_duplicative_certs(self.config, ['wow.net']), (None, None))
+            self.assertFalse(mock_rc.called)
+            result = find_duplicative_certs(self.config, domains + ['something.new'])
+        # Only the matching lineage is loaded, after being found in the index
+        self.assertEqual(mock_rc.call_count, 1)
+        self.assertEqual(result, (None, self.test_rc))
+
+    @mock.patch('certbot.util.make_or_verify_dir')
+    @mock.patch('certbot._internal.lineage_index.LineageIndex.update')
+    def test_find_duplicative_names_unindexed(self, unused_update, unused_makedir):
+        from certbot._internal.cert_manager import find_duplicative_certs
+        with open(self.test_rc.cert, 'wb') as f:
+            f.write(test_util.load_vector('cert-san_512.pem'))
+        result = find_duplicative_certs(self.config, ['example.com', 'www.example.com'])
+        self.assertTrue(result[0].configfile.filename.endswith('example.org.conf'))
+        self.assertEqual(result[1], None)
+
 
 class CertPathToLineageTest(storage_test.BaseRenewableCertTest):
     """Tests for certbot._internal.cert_manager.cert_path_to_lineage"""
@@ -13,6 +13,7 @@ except ImportError: # pragma: no cover
 from certbot import errors
 from certbot import util
 from certbot._internal import account
+from certbot.interfaces import TransactionalInstaller
 from certbot.compat import filesystem
 from certbot.compat import os
 import certbot.tests.util as test_util
@@ -55,6 +56,53 @@ class DetermineUserAgentTest(test_util.ConfigTestCase):
         real_value_check(platform.python_version(), ua)
 
 
+class ACMEFromConfigKeyTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.client.acme_from_config_key."""
+
+    @mock.patch("certbot._internal.client.acme_client")
+    def test_directory_cache(self, mock_acme_client):
+        from certbot._internal.client import acme_from_config_key
+        acme = acme_from_config_key(self.config, mock.sentinel.key)
+        self.assertEqual(acme, mock_acme_client.BackwardsCompatibleClientV2.return_value)
+        mock_acme_client.DirectoryCache.assert_called_once_with(
+            self.config.acme_directory_cache_dir)
+        mock_acme_client.BackwardsCompatibleClientV2.assert_called_once_with(
+            mock_acme_client.ClientNetwork.return_value, mock.sentinel.key, self.config.server,
+            directory_cache=mock_acme_client.DirectoryCache.return_value)
+
+
+class ACMEClientCacheTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.client.ACMEClientCache."""
+
+    def setUp(self):
+        super(ACMEClientCacheTest, self).setUp()
+        from certbot._internal.client import ACMEClientCache
+        self.cache = ACMEClientCache()
+        self.config.server = "https://acme.example/directory"
+        self.config.no_verify_ssl = False
+        self.accounts = [mock.MagicMock(id="a"), mock.MagicMock(id="b")]
+
+    @mock.patch("certbot._internal.client.determine_user_agent")
+    @mock.patch("certbot._internal.client.acme_from_config_key")
+    def test_get(self, mock_acme_from_config_key, mock_user_agent):
+        mock_acme_from_config_key.side_effect = lambda *args: mock.MagicMock()
+        mock_user_agent.return_value = "other agent"
+
+        acme = self.cache.get(self.config, self.accounts[0])
+        mock_acme_from_config_key.assert_called_once_with(
+            self.config, self.accounts[0].key, self.accounts[0].regr)
+        self.assertTrue(self.cache.get(self.config, self.accounts[0]) is acme)
+        self.assertEqual(acme.client.net.user_agent, "other agent")
+        self.assertEqual(mock_acme_from_config_key.call_count, 1)
+
+        self.assertFalse(self.cache.get(self.config, self.accounts[1]) is acme)
+        self.config.no_verify_ssl = True
+        self.assertFalse(self.cache.get(self.config, self.accounts[0]) is acme)
+        self.config.server = "https://acme-staging.example/directory"
+        self.assertFalse(self.cache.get(self.config, self.accounts[0]) is acme)
+        self.assertEqual(mock_acme_from_config_key.call_count, 4)
+
+
 class RegisterTest(test_util.ConfigTestCase):
     """Tests for certbot._internal.client.register."""
 
@@ -214,6 +262,11 @@ class RegisterTest(test_util.ConfigTestCase):
         self.assertFalse(mock_handle.called)
 
 
+def _transactional_installer():
+    """Returns an installer mock implementing TransactionalInstaller."""
+    return mock.MagicMock(__class__=TransactionalInstaller)
+
+
 class ClientTestCommon(test_util.ConfigTestCase):
     """Common base class for certbot._internal.client.Client tests."""
 
@@ -339,6 +392,22 @@ class ClientTest(ClientTestCommon):
         mock_crypto_util.cert_and_chain_from_fullchain.assert_called_once_with(
             self.eg_order.fullchain_pem)
 
+    @mock.patch("certbot._internal.client.key_pool")
+    @mock.patch("certbot._internal.client.crypto_util")
+    def test_obtain_certificate_pooled_key(self, mock_crypto_util, mock_key_pool):
+        csr = util.CSR(form="pem", file=None, data=CSR_SAN)
+        mock_crypto_util.init_save_csr.return_value = csr
+        mock_key_pool.take.return_value = mock.sentinel.key
+        self._set_mock_from_fullchain(mock_crypto_util.cert_and_chain_from_fullchain)
+
+        self._test_obtain_certificate_common(mock.sentinel.key, csr)
+
+        mock_key_pool.take.assert_called_once_with(
+            self.config, self.config.key_type, self.config.rsa_key_size, None)
+        mock_crypto_util.init_save_key.assert_not_called()
+        mock_crypto_util.init_save_csr.assert_called_once_with(
+            mock.sentinel.key, self.eg_domains, self.config.csr_dir)
+
     @mock.patch("certbot._internal.client.crypto_util")
     @mock.patch("certbot.compat.os.remove")
     def test_obtain_certificate_partial_success(self, mock_remove, mock_crypto_util):
@@ -535,6 +604,29 @@ class ClientTest(ClientTestCommon):
         self.assertEqual(installer.save.call_count, 2)
         installer.restart.assert_called_once_with()
 
+    def test_deploy_certificate_transaction(self):
+        installer = _transactional_installer()
+        self.client.installer = installer
+
+        self.client.deploy_certificate(
+            ["foo.bar", "baz.bar"], "key", "cert", "chain", "fullchain")
+        self.assertEqual(installer.deploy_cert.call_count, 2)
+        names = [call[0] for call in installer.method_calls]
+        self.assertEqual(names[0], "begin_transaction")
+        self.assertEqual(names[-2:], ["commit_transaction", "restart"])
+        installer.commit_transaction.assert_called_once_with()
+
+    def test_deploy_certificate_transaction_failure(self):
+        installer = _transactional_installer()
+        self.client.installer = installer
+
+        installer.deploy_cert.side_effect = errors.PluginError
+        self.assertRaises(errors.PluginError, self.client.deploy_certificate,
+                          ["foo.bar"], "key", "cert", "chain", "fullchain")
+        installer.begin_transaction.assert_called_once_with()
+        installer.commit_transaction.assert_not_called()
+        installer.recovery_routine.assert_called_once_with()
+
     def test_deploy_certificate_failure(self):
         installer = mock.MagicMock()
         self.client.installer = installer
@@ -671,6 +763,22 @@ class EnhanceConfigTest(ClientTestCommon):
         self.client.installer.recovery_routine.assert_called_once_with()
         self.client.installer.save.assert_called_once_with(mock.ANY)
 
+    def test_transaction(self):
+        self.client.installer = _transactional_installer()
+        self.config.hsts = True
+        self._test_with_all_supported()
+        self.client.installer.begin_transaction.assert_called_once_with()
+        self.client.installer.commit_transaction.assert_called_once_with()
+        names = [call[0] for call in self.client.installer.method_calls]
+        self.assertEqual(names[-2:], ["commit_transaction", "restart"])
+
+    def test_transaction_commit_failure(self):
+        self.client.installer = _transactional_installer()
+        self.client.installer.commit_transaction.side_effect = errors.PluginError
+        self._test_error()
+        self.client.installer.recovery_routine.assert_called_once_with()
+        self.client.installer.restart.assert_not_called()
+
     def test_restart_failure(self):
         self.client.installer = mock.MagicMock()
         self.client.installer.restart.side_effect = [errors.PluginError, None]
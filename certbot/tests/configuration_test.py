@@ -44,11 +44,14 @@ class NamespaceConfigTest(test_util.ConfigTestCase):
     @mock.patch('certbot._internal.configuration.constants')
     def test_dynamic_dirs(self, mock_constants):
         mock_constants.ACCOUNTS_DIR = 'acc'
+        mock_constants.ACME_DIRECTORY_CACHE_DIR = 'acme-dirs'
         mock_constants.BACKUP_DIR = 'backups'
         mock_constants.CSR_DIR = 'csr'
 
         mock_constants.IN_PROGRESS_DIR = '../p'
         mock_constants.KEY_DIR = 'keys'
+        mock_constants.KEY_POOL_DIR = 'pool'
+        mock_constants.OCSP_CACHE_DIR = 'ocsp'
         mock_constants.TEMP_CHECKPOINT_DIR = 't'
 
         ref_path = misc.underscores_for_unsupported_characters_in_path(
@@ -56,6 +59,9 @@ class NamespaceConfigTest(test_util.ConfigTestCase):
         self.assertEqual(
             os.path.normpath(self.config.accounts_dir),
             os.path.normpath(os.path.join(self.config.config_dir, ref_path)))
+        self.assertEqual(
+            os.path.normpath(self.config.acme_directory_cache_dir),
+            os.path.normpath(os.path.join(self.config.work_dir, 'acme-dirs')))
         self.assertEqual(
             os.path.normpath(self.config.backup_dir),
             os.path.normpath(os.path.join(self.config.work_dir, 'backups')))
@@ -68,6 +74,12 @@ class NamespaceConfigTest(test_util.ConfigTestCase):
         self.assertEqual(
             os.path.normpath(self.config.key_dir),
             os.path.normpath(os.path.join(self.config.config_dir, 'keys')))
+        self.assertEqual(
+            os.path.normpath(self.config.key_pool_dir),
+            os.path.normpath(os.path.join(self.config.config_dir, 'pool')))
+        self.assertEqual(
+            os.path.normpath(self.config.ocsp_cache_dir),
+            os.path.normpath(os.path.join(self.config.work_dir, 'ocsp')))
         self.assertEqual(
             os.path.normpath(self.config.temp_checkpoint_dir),
             os.path.normpath(os.path.join(self.config.work_dir, 't')))
@@ -396,6 +396,49 @@ class CertLoaderTest(unittest.TestCase):
             errors.Error, pyopenssl_load_certificate, bad_cert_data)
 
 
+class ParseCertFileTest(test_util.TempDirTestCase):
+    """Tests for certbot.crypto_util.parse_cert_file"""
+
+    def setUp(self):
+        super(ParseCertFileTest, self).setUp()
+        self.cert_path = os.path.join(self.tempdir, 'cert.pem')
+        with open(self.cert_path, 'wb') as f:
+            f.write(test_util.load_vector('cert-san_512.pem'))
+
+    @classmethod
+    def _call(cls, cert_path):
+        from certbot.crypto_util import parse_cert_file
+        return parse_cert_file(cert_path)
+
+    def test_fields(self):
+        parsed = self._call(self.cert_path)
+        self.assertEqual(parsed.not_before.isoformat(), '2014-12-11T22:34:45+00:00')
+        self.assertEqual(parsed.not_after.isoformat(), '2014-12-18T22:34:45+00:00')
+        self.assertEqual(sorted(parsed.names), ['example.com', 'www.example.com'])
+        self.assertEqual(sorted(parsed.sans), ['example.com', 'www.example.com'])
+        self.assertEqual(parsed.serial, 1337)
+        self.assertRaises(AttributeError, setattr, parsed, 'serial', 0)
+
+    @mock.patch('certbot.crypto_util.crypto.load_certificate',
+                wraps=OpenSSL.crypto.load_certificate)
+    def test_cached_until_modified(self, mock_load):
+        from certbot.crypto_util import notAfter
+        first = self._call(self.cert_path)
+        self.assertEqual(notAfter(self.cert_path), first.not_after)
+        self.assertTrue(self._call(self.cert_path) is first)
+        self.assertEqual(mock_load.call_count, 1)
+
+        with open(self.cert_path, 'wb') as f:
+            f.write(CERT)
+        self.assertEqual(self._call(self.cert_path).names, ('example.com',))
+        self.assertEqual(mock_load.call_count, 2)
+
+    def test_cached_by_real_path(self):
+        link = os.path.join(self.tempdir, 'link.pem')
+        os.symlink(self.cert_path, link)
+        self.assertTrue(self._call(link) is self._call(self.cert_path))
+
+
 class NotBeforeTest(unittest.TestCase):
     """Tests for certbot.crypto_util.notBefore"""
 
@@ -0,0 +1,134 @@
+"""Tests for certbot._internal.key_pool."""
+import unittest
+
+try:
+    import mock
+except ImportError:  # pragma: no cover
+    from unittest import mock
+
+from certbot import crypto_util
+from certbot.compat import filesystem
+from certbot.compat import os
+import certbot.tests.util as test_util
+
+
+class KeyPoolTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.key_pool."""
+
+    def setUp(self):
+        super(KeyPoolTest, self).setUp()
+        self.config.strict_permissions = True
+        self.rsa_dir = os.path.join(self.config.key_pool_dir, "rsa-1024")
+
+    def _fill(self, size, key_type="rsa", elliptic_curve=None):
+        from certbot._internal import key_pool
+        return key_pool.fill(self.config, key_type, 1024, elliptic_curve, size)
+
+    def _take(self, key_type="rsa", elliptic_curve=None):
+        from certbot._internal import key_pool
+        return key_pool.take(self.config, key_type, 1024, elliptic_curve)
+
+    def test_fill(self):
+        self.assertEqual(self._fill(2), 2)
+        self.assertEqual(self._fill(3), 1)
+        self.assertEqual(self._fill(1), 0)
+        names = os.listdir(self.rsa_dir)
+        self.assertEqual(len(names), 3)
+        self.assertTrue(all(name.endswith(".pem") for name in names))
+        self.assertTrue(filesystem.check_mode(self.config.key_pool_dir, 0o700))
+        for name in names:
+            path = os.path.join(self.rsa_dir, name)
+            self.assertTrue(filesystem.check_mode(path, 0o600))
+            with open(path, "rb") as key_file:
+                self.assertTrue(crypto_util.valid_privkey(key_file.read()))
+
+    def test_fill_ecdsa(self):
+        self.assertEqual(self._fill(1, key_type="ecdsa"), 1)
+        self.assertEqual(len(os.listdir(
+            os.path.join(self.config.key_pool_dir, "ecdsa-secp256r1"))), 1)
+
+    def test_take(self):
+        self._fill(1)
+        pooled = os.path.join(self.rsa_dir, os.listdir(self.rsa_dir)[0])
+        with open(pooled, "rb") as key_file:
+            key_pem = key_file.read()
+
+        key = self._take()
+        self.assertEqual(key.pem, key_pem)
+        self.assertEqual(os.path.dirname(key.file), self.config.key_dir)
+        self.assertTrue(key.file.endswith("key-certbot.pem"))
+        self.assertTrue(filesystem.check_mode(key.file, 0o600))
+        self.assertFalse(os.path.exists(pooled))
+
+        self.assertTrue(self._take() is None)
+        self.assertTrue(self._take(key_type="ecdsa", elliptic_curve="secp384r1") is None)
+        self.assertEqual(os.listdir(self.config.key_dir), [os.path.basename(key.file)])
+
+    def test_take_keys_taken_concurrently(self):
+        self._fill(2)
+        with mock.patch("certbot._internal.key_pool.filesystem.replace") as mock_replace:
+            mock_replace.side_effect = OSError
+            self.assertTrue(self._take() is None)
+        self.assertEqual(mock_replace.call_count, 2)
+        self.assertEqual(os.listdir(self.config.key_dir), [])
+
+    def test_key_kind(self):
+        from certbot._internal import key_pool
+        self.config.key_type = ["rsa"]
+        self.config.rsa_key_size = 4096
+        self.assertEqual(key_pool.key_kind(self.config), ("rsa", 4096, None))
+        self.config.key_type = "ecdsa"
+        self.config.elliptic_curve = "secp384r1"
+        self.assertEqual(key_pool.key_kind(self.config), ("ecdsa", 4096, "secp384r1"))
+
+
+class PrefetcherTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.key_pool.Prefetcher."""
+
+    def setUp(self):
+        super(PrefetcherTest, self).setUp()
+        from certbot._internal import key_pool
+        self.prefetcher = key_pool.Prefetcher(self.config)
+        self.kind = ("rsa", 1024, None)
+        self.rsa_dir = os.path.join(self.config.key_pool_dir, "rsa-1024")
+
+    def tearDown(self):
+        self.prefetcher.close()
+        super(PrefetcherTest, self).tearDown()
+
+    def test_prefetch(self):
+        self.prefetcher.prefetch([self.kind, self.kind])
+        # pylint: disable=protected-access
+        self.prefetcher._workers.close()
+        self.prefetcher._workers.join()
+        names = os.listdir(self.rsa_dir)
+        self.assertEqual(len(names), 2)
+        for name in names:
+            with open(os.path.join(self.rsa_dir, name), "rb") as key_file:
+                self.assertTrue(crypto_util.valid_privkey(key_file.read()))
+
+    @mock.patch("certbot._internal.key_pool.multiprocessing.Pool")
+    def test_prefetch_only_missing_keys(self, mock_pool):
+        from certbot._internal import key_pool
+        key_pool.fill(self.config, "rsa", 1024, None, 1)
+        self.prefetcher.prefetch([self.kind, self.kind])
+        self.assertFalse(mock_pool.called)
+
+        self.prefetcher.prefetch([self.kind, self.kind, self.kind, ("ecdsa", 1024, None)])
+        mock_pool.assert_called_once_with(mock.ANY)
+        self.assertEqual(mock_pool().apply_async.call_count, 3)
+
+    @mock.patch("certbot._internal.key_pool.misc.POSIX_MODE", False)
+    @mock.patch("certbot._internal.key_pool.multiprocessing.Pool")
+    def test_prefetch_not_posix(self, mock_pool):
+        self.prefetcher.prefetch([self.kind, self.kind])
+        self.assertFalse(mock_pool.called)
+
+    def test_add_failure_is_ignored(self):
+        from certbot._internal import key_pool
+        # pylint: disable=protected-access
+        key_pool._add_quietly(os.path.join(self.tempdir, "missing"), b"key")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,117 @@
+"""Tests for certbot._internal.lineage_index."""
+import json
+import unittest
+
+try:
+    import mock
+except ImportError: # pragma: no cover
+    from unittest import mock
+
+from certbot._internal import constants
+from certbot.compat import os
+import certbot.tests.util as test_util
+import storage_test
+
+
+class LineageIndexTest(storage_test.BaseRenewableCertTest):
+    """Tests for certbot._internal.lineage_index.LineageIndex."""
+
+    def setUp(self):
+        super(LineageIndexTest, self).setUp()
+        self.config_file["renewalparams"] = {}
+        self.config_file.write()
+        self.test_rc.configuration["renewalparams"] = {}
+        self._write_out_ex_kinds()
+        with open(self.test_rc.cert, "wb") as f:
+            f.write(test_util.load_vector("cert-san_512.pem"))
+        with open(self.test_rc.privkey, "wb") as f:
+            f.write(test_util.load_vector("rsa2048_key.pem"))
+        self.index_path = os.path.join(self.config.config_dir,
+                                       constants.LINEAGE_INDEX_FILENAME)
+
+    def _index(self):
+        from certbot._internal.lineage_index import LineageIndex
+        return LineageIndex(self.config)
+
+    def test_update_and_get(self):
+        index = self._index()
+        index.update(self.test_rc)
+        index.save()
+
+        summary = self._index().get("example.org", self.config_file.filename)
+        self.assertEqual(summary.lineagename, "example.org")
+        self.assertEqual(summary.cert_path, self.test_rc.cert)
+        self.assertEqual(summary.key_path, self.test_rc.privkey)
+        self.assertEqual(summary.chain_path, self.test_rc.chain)
+        self.assertEqual(summary.fullchain_path, self.test_rc.fullchain)
+        self.assertEqual(summary.archive_dir, self.test_rc.archive_dir)
+        self.assertEqual(summary.names(), self.test_rc.names())
+        self.assertEqual(summary.target_expiry, self.test_rc.target_expiry)
+        self.assertEqual(summary.is_test_cert, self.test_rc.is_test_cert)
+
+    def test_get_missing(self):
+        self.assertTrue(self._index().get("example.org", self.config_file.filename) is None)
+
+    def test_get_stale_renewal_conf(self):
+        index = self._index()
+        index.update(self.test_rc)
+        with open(self.config_file.filename, "a") as f:
+            f.write("# modified\n")
+        self.assertTrue(index.get("example.org", self.config_file.filename) is None)
+
+    def test_get_stale_cert_link(self):
+        index = self._index()
+        index.update(self.test_rc)
+        self._write_out_kind("cert", 11)
+        self.assertTrue(index.get("example.org", self.config_file.filename) is None)
+
+    def test_update_failure_removes_entry(self):
+        index = self._index()
+        index.update(self.test_rc)
+        with mock.patch("certbot._internal.lineage_index._entry_for") as mock_entry:
+            mock_entry.side_effect = OSError
+            index.update(self.test_rc)
+        self.assertTrue(index.get("example.org", self.config_file.filename) is None)
+
+    def test_prune_and_remove(self):
+        index = self._index()
+        index.update(self.test_rc)
+        index.prune(["example.org"])
+        self.assertFalse(index.get("example.org", self.config_file.filename) is None)
+        index.prune([])
+        self.assertTrue(index.get("example.org", self.config_file.filename) is None)
+
+    def test_lineages_sharing_names(self):
+        index = self._index()
+        self.assertFalse("example.org" in index)
+        self.assertEqual(index.lineages_sharing_names(["example.com"]), set())
+        index.update(self.test_rc)
+        self.assertTrue("example.org" in index)
+        self.assertEqual(index.lineages_sharing_names(["example.com", "other.org"]),
+                         set(["example.org"]))
+        self.assertEqual(index.lineages_sharing_names(["other.org"]), set())
+        index.remove("example.org")
+        self.assertEqual(index.lineages_sharing_names(["example.com"]), set())
+
+    def test_save_only_when_modified(self):
+        self._index().save()
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_load_invalid_index(self):
+        with open(self.index_path, "w") as f:
+            f.write("{not json")
+        self.assertTrue(self._index().get("example.org", self.config_file.filename) is None)
+        with open(self.index_path, "w") as f:
+            json.dump({"version": -1, "lineages": {}}, f)
+        self.assertTrue(self._index().get("example.org", self.config_file.filename) is None)
+
+    def test_module_update_and_remove(self):
+        from certbot._internal import lineage_index
+        lineage_index.update(self.config, self.test_rc)
+        self.assertFalse(self._index().get("example.org", self.config_file.filename) is None)
+        lineage_index.remove(self.config, "example.org")
+        self.assertTrue(self._index().get("example.org", self.config_file.filename) is None)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -550,6 +550,33 @@ class DetermineAccountTest(test_util.ConfigTestCase):
         self.assertEqual('other email', self.config.email)
 
 
+class InitLEClientTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.main._init_le_client."""
+
+    def _call(self, acme_clients=None):
+        # pylint: disable=protected-access
+        from certbot._internal.main import _init_le_client
+        with mock.patch('certbot._internal.main.client.Client') as mock_client:
+            _init_le_client(self.config, mock.MagicMock(), None, acme_clients=acme_clients)
+        return mock_client.call_args[1]['acme']
+
+    @mock.patch('certbot._internal.main._determine_account')
+    def test_reuses_acme_client(self, mock_determine_account):
+        acc = mock.MagicMock()
+        mock_determine_account.return_value = (acc, None)
+        acme_clients = mock.MagicMock()
+        self.assertEqual(self._call(acme_clients), acme_clients.get.return_value)
+        acme_clients.get.assert_called_once_with(self.config, acc)
+        self.assertTrue(self._call() is None)
+
+    @mock.patch('certbot._internal.main._determine_account')
+    def test_new_registration(self, mock_determine_account):
+        mock_determine_account.return_value = (mock.MagicMock(), mock.sentinel.acme)
+        acme_clients = mock.MagicMock()
+        self.assertEqual(self._call(acme_clients), mock.sentinel.acme)
+        self.assertFalse(acme_clients.get.called)
+
+
 class MainTest(test_util.ConfigTestCase):
     """Tests for different commands."""
 
@@ -644,11 +671,12 @@ class MainTest(test_util.ConfigTestCase):
     @mock.patch('certbot._internal.eff.handle_subscription')
     @mock.patch('certbot._internal.log.post_arg_parse_setup')
     @mock.patch('certbot._internal.main._report_new_cert')
+    @mock.patch('certbot._internal.main.client.acme_client.DirectoryCache')
     @mock.patch('certbot._internal.main.client.acme_client.Client')
     @mock.patch('certbot._internal.main._determine_account')
     @mock.patch('certbot._internal.main.client.Client.obtain_and_enroll_certificate')
     @mock.patch('certbot._internal.main._get_and_save_cert')
-    def test_user_agent(self, gsc, _obt, det, _client, _, __, ___):
+    def test_user_agent(self, gsc, _obt, det, _client, _cache, _, __, ___):
         # Normally the client is totally mocked out, but here we need more
         # arguments to automate it...
         args = ["--standalone", "certonly", "-m", "none@none.com",
@@ -803,6 +831,19 @@ class MainTest(test_util.ConfigTestCase):
         self._call_no_clientmock(['update_symlinks'])
         self.assertEqual(1, mock_cert_manager.call_count)
 
+    @mock.patch('certbot._internal.main.display_util.notify')
+    @mock.patch('certbot._internal.main.key_pool.fill')
+    def test_fill_key_pool(self, mock_fill, mock_notify):
+        mock_fill.return_value = 3
+        self._call_no_clientmock(['fill_key_pool', '--key-pool-size', '5',
+                                  '--key-type', 'ecdsa', '--elliptic-curve', 'secp384r1'])
+        config = mock_fill.call_args[0][0]
+        mock_fill.assert_called_once_with(config, 'ecdsa', 2048, 'secp384r1', 5)
+        mock_notify.assert_called_once_with('Generated 3 key(s) for the key pool.')
+
+        self._call_no_clientmock(['fill_key_pool'])
+        mock_fill.assert_called_with(mock.ANY, 'rsa', 2048, None, 20)
+
     @mock.patch('certbot._internal.cert_manager.certificates')
     def test_certificates(self, mock_cert_manager):
         self._call_no_clientmock(['certificates'])
@@ -1130,6 +1171,29 @@ class MainTest(test_util.ConfigTestCase):
         args = ["renew", "--dry-run", "-tvv"]
         self._test_renewal_common(True, [], args=args, should_renew=True)
 
+    @mock.patch('certbot._internal.renewal.storage.prefetch_ocsp_statuses')
+    def test_renew_prefetches_ocsp_statuses(self, mock_prefetch):
+        test_util.make_lineage(self.config.config_dir, 'sample-renewal.conf')
+        args = ["renew", "--dry-run"]
+        self._test_renewal_common(True, [], args=args, should_renew=True)
+        self.assertEqual(mock_prefetch.call_count, 1)
+        self.assertEqual(len(mock_prefetch.call_args[0][1]), 1)
+
+        mock_prefetch.reset_mock()
+        args = ["renew", "--dry-run", "--force-renewal"]
+        self._test_renewal_common(True, [], args=args, should_renew=True)
+        self.assertFalse(mock_prefetch.called)
+
+    @mock.patch('certbot._internal.renewal.storage.update_symlinks_bulk')
+    def test_renew_deploys_pending_versions_at_once(self, mock_bulk):
+        mock_bulk.return_value = []
+        test_util.make_lineage(self.config.config_dir, 'sample-renewal.conf')
+        args = ["renew", "--dry-run"]
+        self._test_renewal_common(True, [], args=args, should_renew=True)
+        self.assertEqual(mock_bulk.call_count, 1)
+        self.assertEqual(len(mock_bulk.call_args[0][1]), 1)
+        self.assertTrue(mock_bulk.call_args[1]['deploy_latest'])
+
     def test_reuse_key(self):
         test_util.make_lineage(self.config.config_dir, 'sample-renewal.conf')
         args = ["renew", "--dry-run", "--reuse-key"]
@@ -1242,6 +1306,9 @@ class MainTest(test_util.ConfigTestCase):
             if assert_oc_called is not None:
                 if assert_oc_called:
                     self.assertTrue(mock_renew_cert.called)
+                    from certbot._internal.client import ACMEClientCache
+                    self.assertTrue(isinstance(
+                        mock_renew_cert.call_args[1]['acme_clients'], ACMEClientCache))
                 else:
                     self.assertFalse(mock_renew_cert.called)
 
@@ -1310,6 +1377,23 @@ class MainTest(test_util.ConfigTestCase):
                 self._test_renewal_common(True, None, error_expected=True,
                                           args=['renew'], should_renew=False)
 
+    def test_renew_concurrently(self):
+        renewer_configs_dir = os.path.join(self.config.config_dir, 'renewal')
+        filesystem.makedirs(renewer_configs_dir)
+        for name in ('a.conf', 'b.conf', 'c.conf'):
+            with open(os.path.join(renewer_configs_dir, name), 'w') as f:
+                f.write("My contents don't matter")
+        with mock.patch('certbot._internal.storage.RenewableCert') as mock_rc:
+            mock_lineage = mock.MagicMock()
+            mock_lineage.fullchain = "somepath/fullchain.pem"
+            mock_lineage.configuration = {'renewalparams': {'authenticator': 'webroot'}}
+            mock_rc.return_value = mock_lineage
+            with mock.patch('certbot._internal.main.renew_cert') as mock_renew_cert:
+                self._test_renewal_common(
+                    True, None, should_renew=False,
+                    args=['renew', '--max-concurrent-renewals', '2'])
+        self.assertEqual(mock_renew_cert.call_count, 3)
+
     def test_renew_with_bad_cli_args(self):
         self._test_renewal_common(True, None, args='renew -d example.com'.split(),
                                   should_renew=False, error_expected=True)
@@ -1399,7 +1483,7 @@ class MainTest(test_util.ConfigTestCase):
                                  '--server', server, 'revoke'])
         with open(RSA2048_KEY_PATH, 'rb') as f:
             mock_acme_client.BackwardsCompatibleClientV2.assert_called_once_with(
-                mock.ANY, jose.JWK.load(f.read()), server)
+                mock.ANY, jose.JWK.load(f.read()), server, directory_cache=mock.ANY)
         with open(SS_CERT_PATH, 'rb') as f:
             cert = crypto_util.pyopenssl_load_certificate(f.read())[0]
             mock_revoke = mock_acme_client.BackwardsCompatibleClientV2().revoke
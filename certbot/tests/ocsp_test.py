@@ -3,6 +3,8 @@
 import contextlib
 from datetime import datetime
 from datetime import timedelta
+import shutil
+import tempfile
 import unittest
 
 from cryptography import x509
@@ -17,6 +19,7 @@ except ImportError: # pragma: no cover
 import pytz
 
 from certbot import errors
+from certbot.compat import os
 from certbot.tests import util as test_util
 
 try:
@@ -40,16 +43,14 @@ class OCSPTestOpenSSL(unittest.TestCase):
 
     def setUp(self):
         from certbot import ocsp
-        with mock.patch('certbot.ocsp.Popen') as mock_popen:
-            with mock.patch('certbot.util.exe_exists') as mock_exists:
-                mock_communicate = mock.MagicMock()
-                mock_communicate.communicate.return_value = (None, out)
-                mock_popen.return_value = mock_communicate
-                mock_exists.return_value = True
-                self.checker = ocsp.RevocationChecker(enforce_openssl_binary_usage=True)
+        with mock.patch('certbot.util.exe_exists') as mock_exists:
+            mock_exists.return_value = True
+            self.checker = ocsp.RevocationChecker(enforce_openssl_binary_usage=True)
+        ocsp._openssl_header_with_equals = True
 
     def tearDown(self):
-        pass
+        from certbot import ocsp
+        ocsp._openssl_header_with_equals = None
 
     @mock.patch('certbot.ocsp.logger.info')
     @mock.patch('certbot.ocsp.Popen')
@@ -61,10 +62,17 @@ class OCSPTestOpenSSL(unittest.TestCase):
         mock_exists.return_value = True
 
         from certbot import ocsp
+        ocsp._openssl_header_with_equals = None
         checker = ocsp.RevocationChecker(enforce_openssl_binary_usage=True)
-        self.assertEqual(mock_popen.call_count, 1)
+        self.assertEqual(mock_popen.call_count, 0)
         self.assertEqual(checker.host_args("x"), ["Host=x"])
+        self.assertEqual(mock_popen.call_count, 1)
+        # openssl is only probed once per process
+        checker = ocsp.RevocationChecker(enforce_openssl_binary_usage=True)
+        self.assertEqual(checker.host_args("y"), ["Host=y"])
+        self.assertEqual(mock_popen.call_count, 1)
 
+        ocsp._openssl_header_with_equals = None
         mock_communicate.communicate.return_value = (None, out.partition("\n")[2])
         checker = ocsp.RevocationChecker(enforce_openssl_binary_usage=True)
         self.assertEqual(checker.host_args("x"), ["Host", "x"])
@@ -151,6 +159,8 @@ class OSCPTestCryptography(unittest.TestCase):
     def setUp(self):
         from certbot import ocsp
         self.checker = ocsp.RevocationChecker()
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
         self.cert_path = test_util.vector_path('ocsp_certificate.pem')
         self.chain_path = test_util.vector_path('ocsp_issuer_certificate.pem')
         self.cert_obj = mock.MagicMock()
@@ -169,7 +179,81 @@ class OSCPTestCryptography(unittest.TestCase):
         mock_determine.return_value = ('http://example.com', 'example.com')
         self.checker.ocsp_revoked(self.cert_obj)
 
-        mock_check.assert_called_once_with(self.cert_path, self.chain_path, 'http://example.com', 10)
+        mock_check.assert_called_once_with(self.cert_path, self.chain_path,
+                                           'http://example.com', 10, session=None,
+                                           cache=None)
+
+    @mock.patch('certbot.ocsp._determine_ocsp_server')
+    @mock.patch('certbot.ocsp._check_ocsp_cryptography')
+    def test_ocsp_revoked_by_paths_batch(self, mock_check, mock_determine):
+        from certbot import ocsp
+        mock_determine.return_value = ('http://example.com', 'example.com')
+        sessions = []
+        def _check(cert_path, unused_chain_path, unused_url, unused_timeout, session, cache):
+            self.assertTrue(cache is None)
+            sessions.append(session)
+            if cert_path == 'broken':
+                raise ValueError('broken')
+            return cert_path == 'revoked'
+        mock_check.side_effect = _check
+
+        paths = [('valid', self.chain_path), ('revoked', self.chain_path),
+                 ('broken', self.chain_path)] * 3
+        with mock.patch('certbot.ocsp.logger.warning') as mock_warning:
+            revoked = self.checker.ocsp_revoked_by_paths_batch(paths, max_workers=2)
+        self.assertEqual(revoked, [False, True, False] * 3)
+        self.assertEqual(mock_warning.call_count, 3)
+        self.assertEqual(len(sessions), 9)
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+        self.assertTrue(isinstance(sessions[0], ocsp.requests.Session))
+        self.assertTrue(self.checker._session is None)
+
+    @mock.patch('certbot.ocsp.RevocationChecker.ocsp_revoked')
+    def test_ocsp_revoked_batch(self, mock_revoked):
+        mock_revoked.side_effect = lambda cert: cert is self.cert_obj
+        other = mock.MagicMock()
+        self.assertEqual(self.checker.ocsp_revoked_batch([other, self.cert_obj]),
+                         [False, True])
+        self.assertEqual(self.checker.ocsp_revoked_batch([]), [])
+
+    def test_response_cache(self):
+        from certbot import ocsp
+        cache_dir = os.path.join(self.tempdir, 'ocsp')
+        checker = ocsp.RevocationChecker(cache_dir=cache_dir, cache_refresh_fraction=0.9)
+        with _ocsp_mock(ocsp_lib.OCSPCertStatus.REVOKED,
+                        ocsp_lib.OCSPResponseStatus.SUCCESSFUL) as mocks:
+            mocks['mock_post'].return_value.content = b'der'
+            self.assertTrue(checker.ocsp_revoked(self.cert_obj))
+            self.assertTrue(checker.ocsp_revoked(self.cert_obj))
+            self.assertEqual(mocks['mock_post'].call_count, 1)
+            self.assertEqual(mocks['mock_response'].call_args[0][0], b'der')
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # Past the refresh fraction of the validity period
+            checker = ocsp.RevocationChecker(cache_dir=cache_dir)
+            self.assertTrue(checker.ocsp_revoked(self.cert_obj))
+            self.assertEqual(mocks['mock_post'].call_count, 2)
+
+    def test_response_cache_errors(self):
+        from certbot import ocsp
+        self.assertRaises(ValueError, ocsp.RevocationChecker,
+                          cache_dir=self.tempdir, cache_refresh_fraction=0)
+        cache_dir = os.path.join(self.tempdir, 'ocsp')
+        checker = ocsp.RevocationChecker(cache_dir=cache_dir, cache_refresh_fraction=0.9)
+        with _ocsp_mock(ocsp_lib.OCSPCertStatus.GOOD,
+                        ocsp_lib.OCSPResponseStatus.SUCCESSFUL) as mocks:
+            mocks['mock_post'].return_value.content = b'der'
+            # The cache directory can't be created
+            with open(cache_dir, 'w'):
+                pass
+            self.assertFalse(checker.ocsp_revoked(self.cert_obj))
+            os.remove(cache_dir)
+            self.assertFalse(checker.ocsp_revoked(self.cert_obj))
+
+            # The cached response can't be parsed
+            mocks['mock_response'].side_effect = [ValueError, mocks['mock_response'].return_value]
+            self.assertFalse(checker.ocsp_revoked(self.cert_obj))
+            self.assertEqual(mocks['mock_post'].call_count, 3)
 
     def test_revoke(self):
         with _ocsp_mock(ocsp_lib.OCSPCertStatus.REVOKED, ocsp_lib.OCSPResponseStatus.SUCCESSFUL):
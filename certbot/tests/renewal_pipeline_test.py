@@ -0,0 +1,120 @@
+"""Tests for certbot._internal.renewal_pipeline."""
+import copy
+import threading
+import unittest
+
+try:
+    import mock
+except ImportError: # pragma: no cover
+    from unittest import mock
+import zope.component
+
+from certbot import interfaces
+import certbot.tests.util as test_util
+
+
+class ThreadConfigTest(unittest.TestCase):
+    """Tests for certbot._internal.renewal_pipeline.ThreadConfig."""
+
+    def test_resolves_per_thread(self):
+        from certbot._internal.renewal_pipeline import ThreadConfig
+        thread_config = ThreadConfig(mock.MagicMock(server="default"))
+        thread_config.use(mock.MagicMock(server="main"))
+        seen = []
+
+        def _read():
+            seen.append(thread_config.server)
+            thread_config.use(mock.MagicMock(server="other"))
+            seen.append(thread_config.server)
+        thread = threading.Thread(target=_read)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(seen, ["default", "other"])
+        self.assertEqual(thread_config.server, "main")
+
+
+class PluginLocksTest(unittest.TestCase):
+    """Tests for certbot._internal.renewal_pipeline.PluginLocks."""
+
+    def setUp(self):
+        from certbot._internal.renewal_pipeline import PluginLocks
+        self.locks = PluginLocks()
+
+    def _is_held(self, authenticator, installer=None):
+        acquired = []
+
+        def _try():
+            with self.locks.hold(mock.MagicMock(authenticator=authenticator,
+                                                installer=installer)):
+                acquired.append(True)
+        thread = threading.Thread(target=_try)
+        thread.daemon = True
+        thread.start()
+        thread.join(0.2)
+        return not acquired
+
+    def test_exclusive_plugins(self):
+        with self.locks.hold(mock.MagicMock(authenticator="standalone", installer="nginx")):
+            self.assertTrue(self._is_held("standalone"))
+            self.assertTrue(self._is_held("webroot", "nginx"))
+            self.assertFalse(self._is_held("webroot"))
+            self.assertFalse(self._is_held("manual", "apache"))
+        self.assertFalse(self._is_held("standalone", "nginx"))
+
+    def test_shared_plugins(self):
+        with self.locks.hold(mock.MagicMock(authenticator="webroot", installer=None)):
+            self.assertFalse(self._is_held("webroot"))
+
+
+class RunTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.renewal_pipeline.run."""
+
+    def setUp(self):
+        super(RunTest, self).setUp()
+        self.candidates = []
+        for name in ("a", "b", "c"):
+            lineage_config = copy.deepcopy(self.config)
+            lineage_config.server = name
+            self.candidates.append((name + ".conf", lineage_config, mock.MagicMock()))
+
+    def _call(self, process):
+        from certbot._internal.renewal_pipeline import run
+        return run(self.config, self.candidates, process)
+
+    @staticmethod
+    def _process(renewal_file, lineage_config, unused_renewal_candidate):
+        utility = zope.component.getUtility(interfaces.IConfig)
+        return renewal_file, utility.server == lineage_config.server
+
+    def test_serial(self):
+        self.assertEqual(self._call(self._process),
+                         [("a.conf", True), ("b.conf", True), ("c.conf", True)])
+
+    def test_concurrent(self):
+        self.config.max_concurrent_renewals = 2
+        self.assertEqual(self._call(self._process),
+                         [("a.conf", True), ("b.conf", True), ("c.conf", True)])
+        self.assertTrue(zope.component.getUtility(interfaces.IConfig) is self.config)
+
+    def test_concurrent_overlap(self):
+        self.config.max_concurrent_renewals = 2
+        barrier = threading.Semaphore(0)
+
+        def _process(renewal_file, unused_lineage_config, unused_renewal_candidate):
+            # The first two lineages wait for each other
+            if renewal_file != "c.conf":
+                barrier.release()
+                barrier.acquire()
+            return renewal_file
+        self.assertEqual(self._call(_process), ["a.conf", "b.conf", "c.conf"])
+
+    def test_concurrent_error(self):
+        self.config.max_concurrent_renewals = 3
+        process = mock.MagicMock(side_effect=KeyboardInterrupt)
+        self.assertRaises(KeyboardInterrupt, self._call, process)
+        self.assertTrue(zope.component.getUtility(interfaces.IConfig) is self.config)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
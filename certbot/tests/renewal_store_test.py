@@ -0,0 +1,92 @@
+"""Tests for certbot._internal.renewal_store."""
+import unittest
+
+import configobj
+
+from certbot import errors
+from certbot.compat import os
+import certbot.tests.util as test_util
+
+
+class RenewalStoreTest(test_util.ConfigTestCase):
+    """Tests for certbot._internal.renewal_store.RenewalStore."""
+
+    def setUp(self):
+        super(RenewalStoreTest, self).setUp()
+        self.renewal_file = test_util.make_lineage(self.config.config_dir,
+                                                   'sample-renewal.conf')
+        from certbot._internal.renewal_store import RenewalStore
+        self.store = RenewalStore(self.config)
+
+    def tearDown(self):
+        self.store.close()
+        super(RenewalStoreTest, self).tearDown()
+
+    def test_refresh_imports_new_and_changed_files(self):
+        self.assertEqual(self.store.refresh(), ['sample-renewal'])
+        self.assertEqual(self.store.refresh(), [])
+
+        config = configobj.ConfigObj(self.renewal_file)
+        config['renewalparams']['authenticator'] = 'webroot'
+        config.write()
+        self.assertEqual(self.store.refresh(), ['sample-renewal'])
+        self.assertEqual(self.store.find('authenticator', 'webroot'), ['sample-renewal'])
+
+    def test_refresh_forgets_removed_files(self):
+        self.store.refresh()
+        os.remove(self.renewal_file)
+        self.assertEqual(self.store.refresh(), [])
+        self.assertTrue(self.store.configfile('sample-renewal') is None)
+
+    def test_configfile(self):
+        self.store.import_conf_files()
+        stored = self.store.configfile('sample-renewal')
+        expected = configobj.ConfigObj(self.renewal_file)
+        self.assertEqual(stored.dict(), expected.dict())
+        self.assertEqual(stored.filename, self.renewal_file)
+        self.assertTrue(self.store.configfile('missing') is None)
+
+    def test_find(self):
+        self.store.import_conf_files()
+        self.assertEqual(self.store.find('authenticator', 'standalone'), ['sample-renewal'])
+        self.assertEqual(self.store.find('authenticator', 'apache'), [])
+        self.assertEqual(self.store.find('renew_before_expiry', '4 years', section=''),
+                         ['sample-renewal'])
+
+    def test_update_exports_files(self):
+        self.store.import_conf_files()
+        self.assertEqual(self.store.update(['sample-renewal', 'missing'],
+                                           {'authenticator': 'webroot', 'installer': None}),
+                         ['sample-renewal'])
+        config = configobj.ConfigObj(self.renewal_file)
+        self.assertEqual(config['renewalparams']['authenticator'], 'webroot')
+        self.assertFalse('installer' in config['renewalparams'])
+        self.assertEqual(config.comments['renewalparams'],
+                         ['', '# Options and defaults used in the renewal process'])
+        # The exported file is known to be up to date
+        self.assertEqual(self.store.refresh(), [])
+
+    def test_import_broken_file(self):
+        with open(self.renewal_file, 'w') as f:
+            f.write('[renewalparams\n')
+        self.assertEqual(self.store.import_conf_files(), [])
+
+    def test_failed_transaction_is_rolled_back(self):
+        self.store.import_conf_files()
+        # pylint: disable=protected-access
+        try:
+            with self.store._transaction():
+                self.store._connection.execute("DELETE FROM lineages")
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(self.store.configfile('sample-renewal') is None)
+
+    def test_unable_to_open(self):
+        from certbot._internal.renewal_store import RenewalStore
+        self.config.config_dir = os.path.join(self.tempdir, 'missing', 'dir')
+        self.assertRaises(errors.Error, RenewalStore, self.config)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
@@ -6,6 +6,8 @@ try:
 except ImportError:  # pragma: no cover
     from unittest import mock
 
+import configobj
+
 from acme import challenges
 from certbot import errors
 from certbot._internal import configuration
@@ -98,6 +100,41 @@ class RenewalTest(test_util.ConfigTestCase):
 
         assert self.config.elliptic_curve == 'secp256r1'
 
+    def test_needs_new_key(self):
+        # pylint: disable=protected-access
+        from certbot._internal import renewal
+        lineage = mock.MagicMock()
+        lineage.should_autorenew.return_value = False
+        self.config.renew_by_default = False
+        self.config.reuse_key = False
+        self.assertFalse(renewal._needs_new_key(self.config, None))
+        self.assertFalse(renewal._needs_new_key(self.config, lineage))
+        lineage.should_autorenew.return_value = True
+        self.assertTrue(renewal._needs_new_key(self.config, lineage))
+        self.config.reuse_key = True
+        self.assertFalse(renewal._needs_new_key(self.config, lineage))
+        self.config.reuse_key = False
+        lineage.should_autorenew.side_effect = errors.Error
+        self.assertFalse(renewal._needs_new_key(self.config, lineage))
+
+    @mock.patch('certbot._internal.renewal.cli.set_by_cli')
+    def test_reconstitute_from_renewal_store(self, mock_set_by_cli):
+        mock_set_by_cli.return_value = False
+        rc_path = test_util.make_lineage(
+            self.config.config_dir, 'sample-renewal.conf')
+        stored = configobj.ConfigObj(rc_path)
+        stored['renewalparams']['authenticator'] = 'webroot'
+        stored['renewalparams']['webroot_path'] = '/var/www/'
+        store = mock.MagicMock()
+        store.configfile.return_value = stored
+
+        from certbot._internal import renewal
+        config = configuration.NamespaceConfig(self.config)
+        lineage = renewal._reconstitute(config, rc_path, store)  # pylint: disable=protected-access
+        store.configfile.assert_called_once_with('sample-renewal')
+        self.assertEqual(lineage.configuration['renewalparams']['authenticator'], 'webroot')
+        self.assertEqual(config.authenticator, 'webroot')
+
 
 class RestoreRequiredConfigElementsTest(test_util.ConfigTestCase):
     """Tests for certbot._internal.renewal.restore_required_config_elements."""
@@ -135,6 +135,8 @@ class BaseRenewableCertTest(test_util.ConfigTestCase):
             f.write(kind.encode('ascii') if value is None else value)
         if kind == "privkey":
             filesystem.chmod(link, 0o600)
+        # The links and archive were modified behind test_rc's back
+        self.test_rc._clear_caches()  # pylint: disable=protected-access
 
     def _write_out_ex_kinds(self):
         for kind in ALL_FOUR:
@@ -398,6 +400,34 @@ class RenewableCertTests(BaseRenewableCertTest):
             else:
                 self.assertFalse(self.test_rc.has_pending_deployment())
 
+    def test_link_targets_and_listings_read_once(self):
+        self._write_out_ex_kinds()
+        with mock.patch("certbot._internal.storage.os.listdir",
+                        wraps=os.listdir) as mock_listdir:
+            with mock.patch("certbot._internal.storage.os.readlink",
+                            wraps=os.readlink) as mock_readlink:
+                self.assertEqual(self.test_rc.latest_common_version(), 12)
+                self.assertEqual(self.test_rc.next_free_version(), 13)
+                self.assertTrue(self.test_rc.has_pending_deployment())
+        self.assertEqual(mock_listdir.call_count, 1)
+        self.assertEqual(mock_readlink.call_count, 4)
+
+    def test_update_all_links_to_clears_link_targets(self):
+        self._write_out_ex_kinds()
+        self.test_rc.update_all_links_to(11)
+        for kind in ALL_FOUR:
+            self.assertEqual(self.test_rc.current_version(kind), 11)
+
+    def test_no_check_symlinks(self):
+        from certbot._internal import storage
+        self._write_out_ex_kinds()
+        os.unlink(self.test_rc.cert)
+        self.assertRaises(errors.CertStorageError, storage.RenewableCert,
+                          self.config_file.filename, self.config)
+        rc = storage.RenewableCert(self.config_file.filename, self.config,
+                                   check_symlinks=False)
+        self.assertTrue(rc.current_target("cert") is None)
+
     def test_names(self):
         # Trying the current version
         self._write_out_kind("cert", 12, test_util.load_vector("cert-san_512.pem"))
@@ -407,6 +437,7 @@ class RenewableCertTests(BaseRenewableCertTest):
 
         # Trying missing cert
         os.unlink(self.test_rc.cert)
+        self.test_rc._clear_caches()  # pylint: disable=protected-access
         self.assertRaises(errors.CertStorageError, self.test_rc.names)
 
     @mock.patch("certbot._internal.storage.cli")
@@ -683,6 +714,23 @@ class RenewableCertTests(BaseRenewableCertTest):
             errors.CertStorageError,
             self.test_rc._update_link_to, "elephant", 17)
 
+    @mock.patch("certbot.ocsp.RevocationChecker.ocsp_revoked_by_paths_batch")
+    @mock.patch("certbot.ocsp.RevocationChecker.ocsp_revoked_by_paths")
+    def test_prefetch_ocsp_statuses(self, mock_checker, mock_batch):
+        from certbot._internal import storage
+        for kind in ALL_FOUR:
+            self._write_out_kind(kind, 1)
+        version = self.test_rc.latest_common_version()
+        broken = mock.MagicMock()
+        broken.latest_common_version.side_effect = errors.CertStorageError
+        mock_batch.return_value = [True]
+
+        storage.prefetch_ocsp_statuses(self.config, [broken, self.test_rc])
+        mock_batch.assert_called_once_with([(self.test_rc.version("cert", version),
+                                             self.test_rc.version("chain", version))])
+        self.assertTrue(self.test_rc.ocsp_revoked(version))
+        self.assertFalse(mock_checker.called)
+
     @mock.patch("certbot.ocsp.RevocationChecker.ocsp_revoked_by_paths")
     def test_ocsp_revoked(self, mock_checker):
         # Write out test files
@@ -826,6 +874,58 @@ class RenewableCertTests(BaseRenewableCertTest):
         storage.RenewableCert(self.config_file.filename, self.config,
             update_symlinks=True)
 
+
+class UpdateSymlinksBulkTest(BaseRenewableCertTest):
+    """Tests for certbot._internal.storage.update_symlinks_bulk"""
+
+    def _call(self, deploy_latest=False):
+        from certbot._internal import storage
+        return storage.update_symlinks_bulk(self.config, [self.test_rc], deploy_latest)
+
+    def test_relinks_to_archive_dir(self):
+        for kind in ALL_FOUR:
+            open(os.path.join(self.test_rc.archive_dir, kind + "1.pem"), "a").close()
+            os.symlink(os.path.join(self.config.config_dir, kind + "1.pem"),
+                       getattr(self.test_rc, kind))
+        self.assertEqual(self._call(), [])
+        for kind in ALL_FOUR:
+            self.assertEqual(os.readlink(getattr(self.test_rc, kind)),
+                             os.path.join("..", "..", "archive", "example.org",
+                                          kind + "1.pem"))
+        self.assertTrue(self.test_rc._consistent())  # pylint: disable=protected-access
+
+    def test_unchanged_links_are_kept(self):
+        self._write_out_ex_kinds()
+        with mock.patch("certbot._internal.storage.os.symlink") as mock_symlink:
+            self.assertEqual(self._call(), [])
+        self.assertFalse(mock_symlink.called)
+
+    @mock.patch("certbot._internal.storage.logger")
+    def test_deploy_latest(self, mock_logger):
+        self._write_out_ex_kinds()
+        self.assertEqual(self._call(deploy_latest=True), [])
+        for kind in ALL_FOUR:
+            self.assertEqual(self.test_rc.current_version(kind), 12)
+        self.assertEqual(mock_logger.warning.call_count, 1)
+        self.assertFalse(os.path.lexists(self.test_rc.cert + ".new"))
+
+    def test_missing_target(self):
+        self._write_out_ex_kinds()
+        os.remove(os.path.join(self.test_rc.archive_dir, "chain11.pem"))
+        failures = self._call()
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0][0] is self.test_rc)
+        self.assertTrue(isinstance(failures[0][1], errors.CertStorageError))
+
+    def test_missing_symlink(self):
+        self._write_out_ex_kinds()
+        os.unlink(self.test_rc.fullchain)
+        with open(self.test_rc.fullchain, "w") as f:
+            f.write("fullchain")
+        failures = self._call()
+        self.assertTrue(isinstance(failures[0][1], errors.CertStorageError))
+
+
 class DeleteFilesTest(BaseRenewableCertTest):
     """Tests for certbot._internal.storage.delete_files"""
     def setUp(self):
@@ -849,6 +949,11 @@ class DeleteFilesTest(BaseRenewableCertTest):
         with mock.patch("certbot._internal.storage.logger"):
             storage.delete_files(self.config, "example.org")
 
+    @mock.patch("certbot._internal.storage.lineage_index.remove")
+    def test_removes_from_lineage_index(self, mock_remove):
+        self._call()
+        mock_remove.assert_called_once_with(self.config, "example.org")
+
     def test_delete_all_files(self):
         self._call()
 